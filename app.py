@@ -1,16 +1,31 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse, Response
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+import asyncio
 import subprocess
+import shutil
 import os,sys
 import json
 import time
 import logging
 from pathlib import Path
-import openai
-import requests
+from typing import List, Optional, Union
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from config import *
+from plan_cache import PlanCache
+from jobs import AdmissionLimiter, JobQueue, Saturated, current_output
+from executor_pool import Cancellation, ExecutorPool, run_command
+from deps import PackageIndex, DependencyResolver
+from plan_stream import PlanParser, stream_chat
+from localpaths import ensure_local_path
+import fileserve
+import fastpaths
+import metrics
+import scratch
+import batch
+import sqlquery
+import prettier
 
 load_dotenv()
 
@@ -28,21 +43,6 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-RUNNING_IN_CODESPACES = "CODESPACES" in os.environ
-RUNNING_IN_DOCKER = os.path.exists("/.dockerenv")
-logging.basicConfig(level=logging.INFO)
-
-def ensure_local_path(path: str) -> str:
-    """Ensure the path uses './data/...' locally, but '/data/...' in Docker."""
-    if ((not RUNNING_IN_CODESPACES) and RUNNING_IN_DOCKER): 
-        print("IN HERE",RUNNING_IN_DOCKER) # If absolute Docker path, return as-is :  # If absolute Docker path, return as-is
-        return path
-    
-    else:
-        logging.info(f"Inside ensure_local_path with path: {path}")
-        return path.lstrip("/")  
-
-
 # OpenAI API Configuration
 AIPROXY_TOKEN = os.getenv("AIPROXY_TOKEN")
                      
@@ -50,16 +50,76 @@ if not AIPROXY_TOKEN:
     logging.error("AIPROXY_TOKEN is not set! Please set it as an environment variable.")
     raise ValueError("AIPROXY_TOKEN is not set! Please set it as an environment variable.")
 
-client = openai.OpenAI(api_key=AIPROXY_TOKEN)
+plan_cache = PlanCache(os.path.join(CACHE_DIR, "plans"), SYSTEM_PROMPT3, ttl=PLAN_CACHE_TTL, max_entries=PLAN_CACHE_SIZE)
+
+# Shared, pooled HTTP client for LLM calls so requests reuse connections; built on first use
+llm_client = None
+
+def get_llm_client():
+    global llm_client
+    if llm_client is None:
+        import httpx
+
+        llm_client = httpx.AsyncClient(
+            timeout=LLM_TIMEOUT,
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+        )
+    return llm_client
+
+# Dependency sets missing from the image are installed once into a cached directory
+dependency_resolver = DependencyResolver(os.path.join(CACHE_DIR, "envs"), PackageIndex())
+
+# Wall-clock, CPU and memory limits for every execution of generated code
+EXEC_LIMITS = {
+    "timeout": EXEC_TIMEOUT,
+    "cpu_seconds": EXEC_CPU_SECONDS,
+    "memory_bytes": EXEC_MEMORY_BYTES,
+    "output_bytes": OUTPUT_CAPTURE_BYTES,
+    "spool_bytes": OUTPUT_SPOOL_BYTES,
+}
+
+# Warm Python workers need fork(); fall back to a fresh interpreter elsewhere
+executor_pool = ExecutorPool(EXECUTOR_POOL_SIZE, EXECUTOR_MAX_RUNS, PRELOAD_MODULES, EXEC_LIMITS) if EXECUTOR_POOL_SIZE > 0 and hasattr(os, "fork") else None
+
+# Tasks beyond MAX_CONCURRENT_TASKS wait; /run requests beyond MAX_QUEUED_TASKS more get a 429
+admission = AdmissionLimiter(MAX_CONCURRENT_TASKS, MAX_QUEUED_TASKS)
+
+metrics.REGISTRY.register(metrics.Gauge("agent_plan_cache_hits", "Plan cache hits since start", collect=lambda: plan_cache.hits))
+metrics.REGISTRY.register(metrics.Gauge("agent_plan_cache_misses", "Plan cache misses since start", collect=lambda: plan_cache.misses))
+metrics.REGISTRY.register(metrics.Gauge("agent_plan_cache_hit_ratio", "Plan cache hit ratio", collect=lambda: plan_cache.stats()["hit_rate"]))
+metrics.REGISTRY.register(metrics.Gauge("agent_tasks_running", "Tasks holding an admission slot", collect=lambda: admission.running))
+metrics.REGISTRY.register(metrics.Gauge("agent_tasks_waiting", "Tasks waiting for an admission slot", collect=lambda: admission.waiting))
+
+@app.middleware("http")
+async def record_timing(request: Request, call_next):
+    """Time every request and report its stages in a Server-Timing header."""
+    spans = metrics.start_request()
+    metrics.IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.IN_FLIGHT.dec()
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    metrics.REQUEST_SECONDS.observe(elapsed, path=route.path if route is not None else "unmatched")
+    response.headers["Server-Timing"] = metrics.server_timing(spans + [("total", elapsed)])
+    return response
 
 def install_dependencies(language: str, dependencies: list):
-    """Install dependencies based on the language."""
+    """Install dependencies based on the language; returns extra Python import paths."""
     if not dependencies:
         logging.info("No dependencies to install.")
-        return
+        return []
+
+    if language == "python":
+        try:
+            return dependency_resolver.resolve(dependencies)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Dependency installation failed: {e.stderr.strip()}")
+            raise HTTPException(status_code=500, detail=f"Dependency installation failed: {e.stderr.strip()}")
 
     commands = {
-        "python": ["pip", "install"],
         "node": ["npm", "install", "--global"],
         "bash": ["sudo", "apt-get", "install", "-y"]
     }
@@ -71,18 +131,28 @@ def install_dependencies(language: str, dependencies: list):
         except subprocess.CalledProcessError as e:
             logging.error(f"Dependency installation failed: {e.stderr.strip()}")
             raise HTTPException(status_code=500, detail=f"Dependency installation failed: {e.stderr.strip()}")
+    return []
+
+def execute_code(llmcode: dict, cwd: str = None, paths: list = None, worker=None, cancel: Cancellation = None):
+    """Execute code in the appropriate environment.
 
-def execute_code(llmcode: dict):
-    """Execute code in the appropriate environment."""
+    `paths` are already-resolved dependency import paths and `worker` a reserved
+    executor worker, both from a streamed plan. `cancel` lets another thread
+    kill the run.
+    """
     language = llmcode.get("language", "").lower()
     code = llmcode.get("code", "")
 
     if not code:
+        if worker is not None:
+            executor_pool.release(worker)
         logging.error("No code provided for execution.")
         return False, "No code provided."
 
-    dependencies = llmcode.get("python_dependencies", []) if language == "python" else []
-    install_dependencies(language, dependencies)
+    if paths is None:
+        dependencies = llmcode.get("python_dependencies", []) if language == "python" else []
+        with metrics.span("deps"):
+            paths = install_dependencies(language, dependencies)
 
     commands = {
         "python": [sys.executable, "-c", code],
@@ -94,71 +164,368 @@ def execute_code(llmcode: dict):
         logging.error(f"Unsupported language: {language}")
         return False, f"Unsupported language: {language}"
 
-    try:
-        result = subprocess.run(commands[language], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        if result.stderr.strip():
-            logging.error(f"Execution error ({language}): {result.stderr.strip()}")
-            return False, result.stderr.strip()
-
-        logging.info(f"Code execution succeeded for {language}: {result.stdout.strip()}")
-        return True, result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Execution error ({language}): {e.stderr.strip()}")
-        return False, e.stderr.strip()
-
-def run_task_fix(task: str, llm_output: str, max_retries: int = 2):
-    """Try executing the task, retrying with LLM fixes if errors occur."""
+    # Jobs see the output live; everything else only gets the captured tail
+    output = current_output.get()
+    on_output = output.write if output is not None else None
+    with metrics.span("exec"):
+        if language == "python" and executor_pool is not None:
+            returncode, stdout, stderr, usage = executor_pool.run(
+                code, cwd=cwd, paths=paths, worker=worker, on_output=on_output, cancel=cancel)
+        else:
+            env = {**os.environ, "PYTHONPATH": os.pathsep.join(paths + [os.environ.get("PYTHONPATH", "")])} if paths else None
+            returncode, stdout, stderr, usage = run_command(
+                commands[language], env=env, cwd=cwd, limits=EXEC_LIMITS, on_output=on_output, cancel=cancel)
+    if usage is not None:
+        metrics.SUBPROCESS_CPU.observe(usage["cpu_seconds"], language=language)
+        metrics.SUBPROCESS_RSS.observe(usage["max_rss_bytes"], language=language)
+        if usage.get("timed_out"):
+            metrics.EXEC_TIMEOUTS.inc(language=language)
+
+    if returncode != 0 or stderr.strip():
+        logging.error(f"Execution error ({language}): {stderr.strip()}")
+        return False, stderr.strip()
+
+    logging.info(f"Code execution succeeded for {language}: {stdout.strip()}")
+    return True, stdout.strip()
+
+async def run_task_fix(task: str, llm_output: str, max_retries: int = 2, executed: tuple = None):
+    """Try executing the task, retrying with LLM fixes if errors occur.
+
+    `executed` is the (success, error) of a first attempt already run while the plan streamed in.
+    """
     attempt = 0
+    repaired = False
     while attempt <= max_retries:
         logging.info(f"Attempt {attempt + 1}/{max_retries} for task: {task}")
-        
-        try:
-            llm_output = json.loads(llm_output) if isinstance(llm_output, str) else llm_output
-        except json.JSONDecodeError:
-            logging.error("Invalid JSON format in LLM response")
-            return False
-        
-        success, error = execute_code(llm_output)
+
+        if attempt == 0 and executed is not None:
+            success, error = executed
+        else:
+            try:
+                plan = json.loads(llm_output) if isinstance(llm_output, str) else llm_output
+            except json.JSONDecodeError as e:
+                logging.error("Invalid JSON format in LLM response")
+                if not REPAIR_ENABLED:
+                    plan_cache.evict(task)
+                    return False
+                success, error = False, f"The response was not valid JSON: {e}"
+            else:
+                success, error = await asyncio.to_thread(execute_code, plan)
         if success:
             logging.info(f"Task '{task}' executed successfully.")
+            if repaired:
+                plan_cache.put(task, llm_output if isinstance(llm_output, str) else json.dumps(llm_output))
             return True
-        
-        time.sleep(1)  # Small delay before retrying
+
+        if attempt < max_retries:
+            metrics.RETRIES.inc()
+            fixed = None
+            if REPAIR_ENABLED:
+                with metrics.span("repair"):
+                    fixed = await get_repair(task, llm_output, error)
+            if fixed is not None:
+                llm_output, repaired = fixed, True
+            else:
+                with metrics.span("retry_sleep"):
+                    await asyncio.sleep(1)  # Small delay before retrying
         attempt += 1
 
     logging.error(f"Task '{task}' failed after {max_retries} retries.")
+    plan_cache.evict(task)
     return False
 
-def get_llm_response(task: str):
+def llm_headers() -> dict:
+    return {"Authorization": f"Bearer {AIPROXY_TOKEN}", "Content-Type": "application/json"}
+
+async def chat_completion(messages: list, n: int = 1) -> list:
+    """Return the content of every choice the model produced; raises on API errors."""
+    body = {"model": "gpt-4o-mini", "messages": messages}
+    if n > 1:
+        body.update(n=n, temperature=SPECULATIVE_TEMPERATURE)
+    response = await get_llm_client().post(LLM_API_URL, headers=llm_headers(), json=body)
+    response.raise_for_status()
+    return [choice["message"]["content"] for choice in response.json()["choices"]]
+
+async def get_llm_response(task: str):
     """Fetch LLM response from OpenAI API."""
     try:
-        response = requests.post(
-            "http://aiproxy.sanand.workers.dev/openai/v1/chat/completions",
-            headers={"Authorization": f"Bearer {AIPROXY_TOKEN}", "Content-Type": "application/json"},
-            json={
+        return (await chat_completion([
+            {"role": "system", "content": SYSTEM_PROMPT3},
+            {"role": "user", "content": task}
+        ]))[0]
+    except Exception as e:
+        logging.error(f"OpenAI API error: {e}")
+        return Response(status_code=500)
+
+async def get_repair(task: str, llm_output, error: str):
+    """Ask the LLM to fix a plan that failed, given the error it produced."""
+    previous = llm_output if isinstance(llm_output, str) else json.dumps(llm_output)
+    try:
+        return (await chat_completion([
+            {"role": "system", "content": SYSTEM_PROMPT3},
+            {"role": "user", "content": task},
+            {"role": "assistant", "content": previous},
+            {"role": "user", "content": REPAIR_PROMPT.format(error=error[-REPAIR_ERROR_CHARS:] or "(no error output)")},
+        ]))[0]
+    except Exception as e:
+        logging.error(f"OpenAI API error while repairing: {e}")
+        return None
+
+async def fetch_plan(task: str):
+    """Ask the LLM for a plan and cache it."""
+    with metrics.span("llm"):
+        plan = await get_llm_response(task)
+    if isinstance(plan, str):
+        plan_cache.put(task, plan)
+    return plan
+
+async def release_reservation(reserving):
+    if reserving is not None:
+        try:
+            executor_pool.release(await reserving)
+        except Exception as e:
+            logging.error(f"Executor reservation failed: {e}")
+
+async def cancel_resolution(resolving):
+    """Stop waiting for dependencies nothing will run; the install itself finishes into the cache."""
+    if resolving is not None:
+        resolving.cancel()
+        await asyncio.gather(resolving, return_exceptions=True)
+
+async def execute_streamed(plan: dict, resolving, reserving):
+    """Execute a plan once its dependencies are resolved and its worker is reserved."""
+    try:
+        with metrics.span("deps"):
+            paths = await resolving if resolving is not None else []
+    except Exception as e:
+        await release_reservation(reserving)
+        return False, str(getattr(e, "detail", e))
+    try:
+        worker = await reserving if reserving is not None else None
+    except Exception as e:
+        logging.error(f"Executor reservation failed: {e}")
+        worker = None
+    return await asyncio.to_thread(execute_code, plan, None, paths, worker)
+
+async def stream_and_execute(task: str):
+    """Stream the plan from the LLM and start work as each of its fields arrives.
+
+    Dependencies start resolving when `python_dependencies` arrives, a Python
+    worker is reserved when `language` does, and execution starts as soon as the
+    `code` string closes rather than when the completion ends. Returns
+    (plan, (success, error)), or None if the stream failed before execution began.
+    """
+    started = time.perf_counter()
+    parser = PlanParser()
+    fields = {}
+    resolving = reserving = execution = None
+
+    def start_execution():
+        metrics.record("first_exec", time.perf_counter() - started)
+        return asyncio.create_task(execute_streamed(dict(fields), resolving, reserving))
+
+    try:
+        with metrics.span("llm"):
+            async for delta in stream_chat(get_llm_client(), LLM_API_URL, llm_headers(), {
                 "model": "gpt-4o-mini",
-                "messages": [
+                "messages": [{"role": "system", "content": SYSTEM_PROMPT3}, {"role": "user", "content": task}],
+            }):
+                for key, value in parser.feed(delta):
+                    fields[key] = value
+                    language = str(fields.get("language", "")).lower()
+                    if key == "python_dependencies" and isinstance(value, list) and value:
+                        resolving = asyncio.create_task(asyncio.to_thread(install_dependencies, "python", value))
+                    elif key == "language" and language == "python" and executor_pool is not None:
+                        reserving = asyncio.create_task(asyncio.to_thread(executor_pool.reserve))
+                    # Fields that arrive out of order push execution back to the end of the stream
+                    if execution is None and "code" in fields and language and (
+                            language != "python" or "python_dependencies" in fields):
+                        execution = start_execution()
+    except Exception as e:
+        logging.error(f"OpenAI API streaming error: {e}")
+        if execution is None:
+            await cancel_resolution(resolving)
+            await release_reservation(reserving)
+            return None
+
+    plan = parser.document() or (json.dumps(fields) if execution is not None else parser.buffer)
+    if parser.complete:
+        plan_cache.put(task, plan)
+    if execution is None:
+        if "code" not in fields:
+            await cancel_resolution(resolving)
+            await release_reservation(reserving)
+            return plan, None
+        execution = start_execution()
+    with metrics.span("exec_wait"):
+        return plan, await execution
+
+# Cancelled candidates still clean up their scratch trees; hold references until they finish
+background_tasks = set()
+
+async def run_speculative(task: str, candidates: list, targets: list):
+    """Run candidate plans concurrently in scratch trees and commit the first one that succeeds.
+
+    Candidates still running once there is a winner are cancelled, so they do
+    not keep holding executor workers outside admission control. Returns
+    (winning plan or None, [(plan, error)] for candidates that failed before a winner).
+    """
+    root = os.getcwd()
+    state = {"winner": None}
+    cancels = [Cancellation() for _ in candidates]
+
+    async def attempt(plan: str, cancel: Cancellation):
+        directory = await asyncio.to_thread(scratch.overlay, root, targets)
+        try:
+            try:
+                success, error = await asyncio.to_thread(execute_code, json.loads(plan), directory, None, None, cancel)
+            except (json.JSONDecodeError, AttributeError, HTTPException) as e:
+                success, error = False, str(getattr(e, "detail", e))
+            if success and state["winner"] is None and not cancel.cancelled:
+                state["winner"] = plan
+                await asyncio.to_thread(scratch.commit, directory, root, targets)
+            return plan, success, error
+        finally:
+            await asyncio.to_thread(shutil.rmtree, directory, True)
+
+    pending = [asyncio.create_task(attempt(plan, cancel)) for plan, cancel in zip(candidates, cancels)]
+    background_tasks.update(pending)
+    for task_ in pending:
+        task_.add_done_callback(background_tasks.discard)
+    failures = []
+    try:
+        for finished in asyncio.as_completed(pending):
+            plan, success, error = await finished
+            if success and state["winner"] == plan:
+                logging.info(f"Speculative candidate won for task: {task}")
+                return plan, failures
+            failures.append((plan, error))
+        return None, failures
+    finally:
+        for cancel in cancels:
+            cancel.cancel()
+
+async def plan_and_execute(task: str):
+    """Run a task through the LLM, speculatively when configured and the outputs can be isolated."""
+    targets = scratch.task_targets(task, ensure_local_path) if SPECULATIVE_CANDIDATES > 1 else None
+    cached = plan_cache.get(task)
+    if cached is not None:
+        logging.info("Plan cache hit")
+        return await run_task_fix(task, cached, 2)
+    if targets is not None:
+        with metrics.span("llm"):
+            try:
+                candidates = await chat_completion([
                     {"role": "system", "content": SYSTEM_PROMPT3},
                     {"role": "user", "content": task}
-                ],
-            },
-            timeout=10
-        )
-        return response.json()["choices"][0]["message"]["content"]
+                ], n=SPECULATIVE_CANDIDATES)
+            except Exception as e:
+                logging.error(f"OpenAI API error: {e}")
+                raise HTTPException(status_code=500, detail=f"OpenAI API error: {e}")
+        candidates = [plan for plan in candidates if isinstance(plan, str) and plan.strip()]
+        failures = []
+        if candidates:
+            with metrics.span("speculative"):
+                winner, failures = await run_speculative(task, candidates, targets)
+            if winner is not None:
+                plan_cache.put(task, winner)
+                return True
+        if failures:
+            plan, error = failures[0]
+            with metrics.span("repair"):
+                fixed = await get_repair(task, plan, error) if REPAIR_ENABLED else None
+            return await run_task_fix(task, fixed or plan, 1)
+        logging.warning("No usable speculative candidates, planning sequentially")
+
+    if LLM_STREAMING:
+        streamed = await stream_and_execute(task)
+        if streamed is not None:
+            gpt_answer_json, executed = streamed
+            print(gpt_answer_json)
+            return await run_task_fix(task, gpt_answer_json, 2, executed)
+    gpt_answer_json = await fetch_plan(task)
+    print(gpt_answer_json)
+    return await run_task_fix(task, gpt_answer_json, 2)
+
+async def process_task(task: str, wait: bool = True):
+    """Plan and execute a task without blocking the event loop.
+
+    Runs under an admission slot; with wait=False raises Saturated rather than queueing behind a full line.
+    """
+    async with admission.slot(wait):
+        if FAST_PATHS_ENABLED:
+            with metrics.span("fastpath"):
+                handled = await asyncio.to_thread(fastpaths.run, task, ensure_local_path)
+            if handled:
+                metrics.TASKS.inc(route="fastpath", status="success")
+                return {"status": "success"}
+        success = await plan_and_execute(task)
+        metrics.TASKS.inc(route="llm", status="success" if success else "failure")
+        return {"status": "success" if success else "failure"}
+
+def saturated_response(retry_after: int, detail: str):
+    metrics.REJECTED.inc()
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+job_queue = JobQueue(process_task, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, output_chars=JOB_OUTPUT_CHARS)
+
+def prewarm_sync():
+    """Slow one-off setup that would otherwise land on the first requests."""
+    start = time.perf_counter()
+    get_llm_client()
+    if executor_pool is not None:
+        executor_pool.warm()
+    for module in PREWARM_MODULES:
+        try:
+            __import__(module)
+        except ImportError as e:
+            logging.warning(f"Prewarm could not import {module}: {e}")
+    if PREWARM_PRETTIER:
+        try:
+            prettier.default_daemon().start()
+        except prettier.FormatError as e:
+            logging.warning(f"Prewarm could not start the Prettier daemon: {e}")
+    dependency_resolver.index.load()
+    loaded = plan_cache.preload()
+    logging.info(f"Prewarm finished in {time.perf_counter() - start:.2f}s ({loaded} cached plans loaded)")
+
+async def prewarm():
+    # Let the server start accepting connections first
+    await asyncio.sleep(PREWARM_DELAY)
+    try:
+        await asyncio.to_thread(prewarm_sync)
     except Exception as e:
-        logging.error(f"OpenAI API error: {e}")
-        return Response(status_code=500)
+        logging.error(f"Prewarm failed: {e}")
+
+@app.on_event("startup")
+async def startup():
+    await job_queue.start()
+    if SPECULATIVE_CANDIDATES > 1 and os.path.isabs(ensure_local_path("/data")):
+        logging.warning("SPECULATIVE_CANDIDATES has no effect with absolute /data paths; tasks run sequentially")
+    if PREWARM_ENABLED:
+        task = asyncio.create_task(prewarm())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    if llm_client is not None:
+        await llm_client.aclose()
+    if executor_pool is not None:
+        executor_pool.close()
+    sqlquery.default_service().close()
+    prettier.default_daemon().close()
 
 @app.post("/run")
 async def run(task: str):
     """Handle task execution request."""
     try:
         logging.info(f"Received task request: {task}")
-        gpt_answer_json = get_llm_response(task)
-        print(gpt_answer_json)
-        success = run_task_fix(task, gpt_answer_json, max_retries=2)
-        return {"status": "success" if success else "failure"}
+        return await process_task(task, wait=False)
+    except Saturated as e:
+        logging.warning(f"Rejected task, agent is saturated: {task}")
+        raise saturated_response(e.retry_after, str(e))
     except KeyError as e:
         logging.error(f"Key error: {e}")
         raise HTTPException(status_code=400, detail=f"Key error: {e}")
@@ -167,15 +534,191 @@ async def run(task: str):
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
 
 
+class BatchTask(BaseModel):
+    task: str
+    reads: Optional[List[str]] = None
+    writes: Optional[List[str]] = None
+    after: List[int] = []
+
+
+class BatchRequest(BaseModel):
+    tasks: List[Union[str, BatchTask]]
+
+
+@app.post("/run/batch")
+async def run_batch(request: BatchRequest):
+    """Run a batch of tasks, in parallel where their paths allow, streaming NDJSON results as each finishes.
+
+    Identical tasks run once. Tasks that write a path another task reads or
+    writes keep their order in the batch; reads/writes are inferred from the
+    task unless given, and `after` lists earlier tasks to wait for.
+    """
+    if len(request.tasks) > BATCH_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TASKS} tasks per batch")
+    if admission.saturated():
+        raise saturated_response(admission.retry_after(), "Agent is saturated, try again later")
+    items = [{"task": item} if isinstance(item, str) else item.model_dump() for item in request.tasks]
+    try:
+        nodes, _ = batch.plan_batch(items, ensure_local_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logging.info(f"Running batch of {len(items)} tasks as {len(nodes)} distinct tasks")
+
+    async def results():
+        async for node, result, seconds in batch.run_batch(nodes, process_task, BATCH_CONCURRENCY):
+            for index in node.indexes:
+                yield json.dumps({
+                    "index": index,
+                    "task": node.task,
+                    **result,
+                    "seconds": round(seconds, 3),
+                    "after": sorted(earlier.index for earlier in node.after),
+                    "duplicate_of": node.index if index != node.index else None,
+                }) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.get("/read",response_class=PlainTextResponse)
-async def read_file(path: str = Query(..., description="Path to the file to read")):
+async def read_file(
+    path: str = Query(..., description="Path to the file to read"),
+    offset: int = Query(0, ge=0, description="Byte offset to start reading from"),
+    limit: Optional[int] = Query(None, ge=0, description="Maximum number of bytes to return"),
+    tail: Optional[int] = Query(None, ge=0, description="Return only the last N lines"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+):
+    """Stream a file from disk, honouring Range and conditional request headers."""
     logging.info(f"Inside read_file with path: {path}")
     output_file_path = ensure_local_path(path)
-    if not os.path.exists(output_file_path):
+    if not os.path.isfile(output_file_path):
         raise HTTPException(status_code=500, detail=f"Error executing function in read_file (GET API")
-    with open(output_file_path, "r") as file:
-        content = file.read()
-    return PlainTextResponse(content)
+
+    stat = os.stat(output_file_path)
+    size = stat.st_size
+    headers = {
+        "ETag": fileserve.file_etag(stat),
+        "Last-Modified": fileserve.last_modified(stat),
+        "Accept-Ranges": "bytes",
+    }
+    if fileserve.not_modified(stat, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if range_header and (if_range is None or if_range == headers["ETag"]):
+        try:
+            byte_range = fileserve.parse_range(range_header, size)
+        except ValueError:
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    elif tail is not None:
+        start = fileserve.tail_offset(output_file_path, tail, size)
+    else:
+        start = min(offset, size)
+        if limit is not None:
+            end = min(end, start + limit - 1)
+
+    headers["Content-Length"] = str(max(0, end - start + 1))
+    return StreamingResponse(
+        fileserve.iter_file(output_file_path, start, end, READ_CHUNK_SIZE, use_mmap=size >= READ_MMAP_THRESHOLD),
+        status_code=status_code,
+        media_type=fileserve.media_type(output_file_path),
+        headers=headers,
+    )
+
+
+@app.post("/query")
+async def run_query(
+    database: str = Query(..., description="Path to the SQLite database file"),
+    sql: str = Query(..., description="Read-only SELECT statement"),
+    params: Optional[str] = Query(None, description="JSON array of bound parameters"),
+    engine: str = Query("auto", pattern="^(auto|sqlite|duckdb)$", description="Query engine"),
+):
+    """Run a read-only SQL query through the pooled query service."""
+    path = ensure_local_path(database)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Database not found: {database}")
+    try:
+        bound = json.loads(params) if params else []
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid params: {e}")
+    if not isinstance(bound, list):
+        raise HTTPException(status_code=400, detail="params must be a JSON array")
+    try:
+        with metrics.span("query"):
+            return await asyncio.to_thread(sqlquery.query, path, sql, bound, engine, SQL_MAX_ROWS)
+    except sqlquery.QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Query failed: {e}")
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(task: str):
+    """Queue a task and return its job id for polling."""
+    try:
+        job = job_queue.submit(task)
+    except asyncio.QueueFull:
+        raise saturated_response(admission.retry_after(), "Job queue is full, try again later")
+    logging.info(f"Queued job {job.id} for task: {task}")
+    return {"id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status and result of a queued task."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events: the job's output as it is produced, then its result.
+
+    `output` events carry {"stream", "text"} and an id to resume from with
+    Last-Event-ID; `truncated` reports chunks that fell out of the buffer
+    before they were sent; `result` is the final job status.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else -1
+
+    async def events():
+        nonlocal after
+        while True:
+            closed = job.output.closed
+            chunks, dropped = job.output.read(after)
+            if dropped:
+                yield f"event: truncated\ndata: {json.dumps({'dropped_chunks': dropped})}\n\n"
+            for seq, stream, text in chunks:
+                yield f"id: {seq}\nevent: output\ndata: {json.dumps({'stream': stream, 'text': text})}\n\n"
+                after = seq
+            if closed and not chunks:
+                yield f"event: result\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            if not chunks and not await job.output.wait(after, 15):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus metrics."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Plan cache hit/miss counters."""
+    return plan_cache.stats()
 
 
 @app.get("/")
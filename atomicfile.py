@@ -0,0 +1,29 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# mkstemp creates files 0600; read the umask once, at import, to give them the mode open() would
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_path(path: str):
+    """Path of a fresh temp file next to `path` that replaces it if the block succeeds and is removed if it fails.
+
+    Every call gets its own file, so threads writing the same path never share one.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
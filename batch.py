@@ -0,0 +1,130 @@
+import asyncio
+import os
+import re
+import time
+
+from fastpaths import PATH
+from plan_cache import normalize_task
+
+# Words just before a path that mark it as an output (or an in-place edit) rather than an input
+WRITE_WORDS = re.compile(
+    r"\b(write|writes|written|save|saves|store|create|creates|output|into|to|overwrite|update|"
+    r"append|delete|remove|move|rename|format|formats)\b",
+    re.IGNORECASE,
+)
+
+
+def infer_access(task: str) -> tuple:
+    """(reads, writes): the backtick-quoted paths of a task, split by the words leading up to each."""
+    reads, writes = [], []
+    previous = 0
+    for token in re.finditer(r"`([^`]+)`", task):
+        path = token.group(1)
+        if PATH.fullmatch(path):
+            target = writes if WRITE_WORDS.search(task, previous, token.start()) else reads
+            if path not in target:
+                target.append(path)
+        previous = token.end()
+    return reads, writes
+
+
+def _normalize(path: str, resolve) -> str:
+    return os.path.normpath(resolve(path))
+
+
+def overlaps(a: str, b: str) -> bool:
+    """Whether two normalized paths are the same file or one contains the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+class BatchNode:
+    """One distinct task of a batch and the nodes it has to wait for."""
+
+    def __init__(self, index: int, task: str, reads: list, writes: list):
+        self.index = index
+        self.task = task
+        self.reads = reads
+        self.writes = writes
+        self.after = set()
+        self.indexes = [index]
+
+    @property
+    def barrier(self) -> bool:
+        # Nothing known about what the task touches: order it against everything
+        return self.reads is None
+
+    def conflicts(self, other: "BatchNode") -> bool:
+        if self.barrier or other.barrier:
+            return True
+        return any(overlaps(a, b) for a in self.writes for b in other.reads + other.writes) or \
+            any(overlaps(a, b) for a in other.writes for b in self.reads)
+
+
+def plan_batch(items: list, resolve) -> tuple:
+    """Deduplicate a batch and order conflicting tasks by their position in it.
+
+    `items` are dicts with "task" and optional "reads", "writes" (paths) and
+    "after" (indexes of earlier items). Paths not given are inferred from the
+    task; a task without any paths runs alone. Returns (nodes, node for each
+    item index). Raises ValueError for an `after` that is not an earlier item.
+    """
+    nodes, by_index, seen = [], [], {}
+    for index, item in enumerate(items):
+        after = item.get("after") or []
+        if any(not 0 <= earlier < index for earlier in after):
+            raise ValueError(f"Task {index}: `after` must list indexes of earlier tasks")
+        inferred_reads, inferred_writes = infer_access(item["task"])
+        reads = item["reads"] if item.get("reads") is not None else inferred_reads
+        writes = item["writes"] if item.get("writes") is not None else inferred_writes
+        explicit = item.get("reads") is not None or item.get("writes") is not None
+        if reads or writes or explicit:
+            node = BatchNode(index, item["task"], [_normalize(path, resolve) for path in reads],
+                             [_normalize(path, resolve) for path in writes])
+        else:
+            node = BatchNode(index, item["task"], None, None)
+        key = (normalize_task(item["task"]), tuple(sorted(reads)), tuple(sorted(writes)))
+        original = seen.get(key)
+        # A repeat only shares the first run if nothing in between touched its paths
+        if original is not None and not after and \
+                not any(node.conflicts(other) for other in nodes[nodes.index(original) + 1:]):
+            original.indexes.append(index)
+            by_index.append(original)
+            continue
+        node.after.update(by_index[earlier] for earlier in after)
+        node.after.update(earlier for earlier in nodes if node.conflicts(earlier))
+        seen[key] = node
+        nodes.append(node)
+        by_index.append(node)
+    return nodes, by_index
+
+
+async def run_batch(nodes: list, handler, concurrency: int):
+    """Run nodes as soon as the nodes they wait for are done; yields (node, result, seconds) as each finishes.
+
+    A failed dependency does not stop its dependents; ordering is all that is enforced.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done = {node: asyncio.Event() for node in nodes}
+    finished = asyncio.Queue()
+
+    async def execute(node: BatchNode):
+        try:
+            for earlier in node.after:
+                await done[earlier].wait()
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await handler(node.task)
+                except Exception as e:
+                    result = {"status": "error", "detail": str(getattr(e, "detail", e))}
+            await finished.put((node, result, time.perf_counter() - start))
+        finally:
+            done[node].set()
+
+    tasks = [asyncio.create_task(execute(node)) for node in nodes]
+    try:
+        for _ in nodes:
+            yield await finished.get()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,61 @@
+"""Benchmark logscan against the naive sort-everything approach.
+
+Usage: python benchmarks/bench_logscan.py [--sizes 10000 100000 1000000] [--count 10]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logscan import recent_first_lines
+
+
+def make_logs(directory: str, size: int):
+    base = time.time() - size
+    for n in range(size):
+        path = os.path.join(directory, f"log-{n}.log")
+        with open(path, "w") as file:
+            file.write(f"first line of log {n}\n" + "filler line\n" * random.randint(5, 50))
+        mtime = base + random.random() * size
+        os.utime(path, (mtime, mtime))
+
+
+def naive(directory: str, count: int) -> list:
+    files = sorted(glob.glob(os.path.join(directory, "*.log")), key=os.path.getmtime, reverse=True)
+    lines = []
+    for path in files[:count]:
+        with open(path, "r") as file:
+            lines.append(file.read().split("\n")[0])
+    return lines
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recent-logs scanner")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            make_logs(directory, size)
+            expected, naive_seconds = timed(naive, directory, args.count)
+            result, scan_seconds = timed(recent_first_lines, directory, args.count)
+            assert result == expected, "scanner and naive results differ"
+            print(f"{size:>9} files  naive {naive_seconds:8.3f}s  logscan {scan_seconds:8.3f}s  speedup {naive_seconds / scan_seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark local card-number OCR over a batch of images: cold (Tesseract) and warm (cache) throughput.
+
+Synthetic card images are drawn like the evaluation's `credit_card.png`
+unless --images points at a directory of real ones. The LLM fallback is
+disabled, so misses show how often it would have been called. Needs the
+`tesseract` binary on PATH.
+
+Usage: python benchmarks/bench_ocr.py [--count 50] [--workers 4] [--images DIR]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cardocr
+
+
+def luhn_number(length: int) -> str:
+    digits = [random.choice("3456")] + [random.choice("0123456789") for _ in range(length - 2)]
+    for check in "0123456789":
+        if cardocr.luhn_valid("".join(digits) + check):
+            return "".join(digits) + check
+
+
+def make_card(path: str, number: str):
+    image = Image.new("RGB", (1012, 638), (26, 67, 143))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=12)
+    groups = " ".join(number[i:i + 4] for i in range(0, len(number), 4))
+    draw.text((50, 250), groups, fill="white", font=font)
+    draw.text((50, 400), "VALID\nTHRU", fill="white", font=font)
+    draw.text((50, 480), f"{random.randint(1, 12):02d}/{random.randint(25, 35)}", fill="white", font=font)
+    draw.text((250, 480), f"{random.randint(100, 999)}", fill="white", font=font)
+    draw.text((50, 550), "CARD HOLDER", fill="white", font=font)
+    image.save(path)
+
+
+def run_batch(paths: list, cache, workers: int) -> tuple:
+    def extract(path):
+        try:
+            return cardocr.extract_card_number(path, llm_fallback=False, cache=cache)
+        except ValueError:
+            return None, "miss"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(extract, paths))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local card-number OCR")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--images", help="Directory of card images to use instead of synthetic ones")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.images:
+            paths = sorted(glob.glob(os.path.join(args.images, "*")))
+            expected = [None] * len(paths)
+        else:
+            expected = [luhn_number(random.choice([15, 16])) for _ in range(args.count)]
+            paths = [os.path.join(directory, f"card-{n}.png") for n in range(args.count)]
+            for path, number in zip(paths, expected):
+                make_card(path, number)
+        cache = cardocr.CardNumberCache(os.path.join(directory, "cache"))
+
+        for label in ("cold", "warm"):
+            results, seconds = run_batch(paths, cache, args.workers)
+            misses = sum(source == "miss" for _, source in results)
+            checked = [(number, want) for (number, _), want in zip(results, expected) if want is not None]
+            correct = sum(number == want for number, want in checked)
+            accuracy = f"  correct {correct}/{len(checked)}" if checked else ""
+            print(f"{label}: {len(paths)} images in {seconds:7.3f}s  {len(paths) / seconds:8.1f} images/s  "
+                  f"LLM fallbacks needed {misses}{accuracy}")
+
+
+if __name__ == "__main__":
+    main()
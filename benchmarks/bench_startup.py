@@ -0,0 +1,64 @@
+"""Measure cold start: time from process start to the first successful `GET /`.
+
+Each run starts the agent under uvicorn in a fresh process and polls `/`
+until it answers. The agent needs AIPROXY_TOKEN set; any value works since
+`/` never calls the LLM.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--port 8765] [--no-prewarm]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def first_response(port: int, env: dict, timeout: float) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"No response within {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from process start to first / response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-prewarm", action="store_true", help="Start with PREWARM_ENABLED=0")
+    args = parser.parse_args()
+
+    env = {**os.environ, "AIPROXY_TOKEN": os.environ.get("AIPROXY_TOKEN", "benchmark")}
+    if args.no_prewarm:
+        env["PREWARM_ENABLED"] = "0"
+    timings = [first_response(args.port, env, args.timeout) for _ in range(args.runs)]
+    print(f"first / response over {args.runs} runs: "
+          f"min {min(timings) * 1000:.0f} ms, median {statistics.median(timings) * 1000:.0f} ms, "
+          f"max {max(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
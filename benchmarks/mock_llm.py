@@ -0,0 +1,115 @@
+"""Offline stand-in for the OpenAI proxy, for reproducible benchmarks.
+
+Chat completions answer with a plan that solves the task through the agent's
+built-in fastpaths handlers (or fails for unknown tasks) after a fixed
+simulated model latency. With --broken, that fraction of first-attempt plans
+raise instead, to exercise the repair loop and speculative candidates: that
+share of the choices of a multi-choice request, and of single-choice (including
+streamed) requests in arrival order. Repair requests always get a working plan. Requests with "stream": true get the
+completion as server-sent events, with the latency spread over the chunks as a
+real model emits tokens. Embeddings come from the deterministic hashing embedder.
+
+Usage: python benchmarks/mock_llm.py [--port 9000] [--latency 0.5] [--broken 0.5]
+Then start the agent with LLM_API_URL=http://localhost:9000/openai/v1/chat/completions
+and EMBEDDING_API_URL=http://localhost:9000/openai/v1/embeddings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity import HashingEmbedder
+
+BROKEN_PLAN = """raise RuntimeError("mock: deliberately broken plan")
+"""
+PLAN = """import sys
+import fastpaths
+from localpaths import ensure_local_path
+task = {task!r}
+sys.exit(0 if fastpaths.run(task, ensure_local_path) else 1)
+"""
+
+app = FastAPI()
+app.state.latency = 0.0
+app.state.broken = 0.0
+app.state.requests = 0
+embedder = HashingEmbedder(dim=1536)
+CHUNK_SIZE = 16
+
+
+def plan_for(task: str, broken: bool = False) -> str:
+    code = BROKEN_PLAN if broken else PLAN.format(task=task)
+    return json.dumps({"python_dependencies": [], "language": "python", "code": code})
+
+
+def next_request_broken() -> bool:
+    """Whether the next single-choice first attempt breaks; spreads the broken fraction evenly over requests."""
+    app.state.requests += 1
+    count = app.state.requests
+    return int(count * app.state.broken) > int((count - 1) * app.state.broken)
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    task = next(message["content"] for message in body["messages"] if message["role"] == "user")
+    repairing = any(message["role"] == "assistant" for message in body["messages"])
+    n = body.get("n", 1)
+    if n == 1:
+        broken = [not repairing and next_request_broken()]
+    else:
+        broken = [not repairing and (index + 1) / n <= app.state.broken for index in range(n)]
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(plan_for(task, broken[0])), media_type="text/event-stream")
+    await asyncio.sleep(app.state.latency)
+    return {
+        "object": "chat.completion",
+        "model": body.get("model", "mock"),
+        "choices": [
+            {
+                "index": index,
+                "message": {"role": "assistant", "content": plan_for(task, broken[index])},
+                "finish_reason": "stop",
+            }
+            for index in range(n)
+        ],
+    }
+
+
+async def stream_completion(content: str):
+    chunks = [content[start:start + CHUNK_SIZE] for start in range(0, len(content), CHUNK_SIZE)]
+    for chunk in chunks:
+        await asyncio.sleep(app.state.latency / len(chunks))
+        yield f"data: {json.dumps({'object': 'chat.completion.chunk', 'choices': [{'index': 0, 'delta': {'content': chunk}}]})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    vectors = embedder.embed(texts)
+    return {
+        "object": "list",
+        "model": body.get("model", "mock"),
+        "data": [{"object": "embedding", "index": n, "embedding": vector.tolist()} for n, vector in enumerate(vectors)],
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI endpoint for offline benchmarks")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated model latency in seconds")
+    parser.add_argument("--broken", type=float, default=0.0, help="Fraction of first-attempt plans that fail")
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    app.state.broken = args.broken
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
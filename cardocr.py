@@ -0,0 +1,200 @@
+import base64
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+
+import httpx
+import pytesseract
+from PIL import Image, ImageOps
+
+from atomicfile import atomic_path
+import config
+
+DIGITS = "0123456789"
+# Sparse text first, since card faces scatter short fields; then one uniform block
+TESSERACT_CONFIGS = [f"--psm 11 -c tessedit_char_whitelist={DIGITS}", f"--psm 6 -c tessedit_char_whitelist={DIGITS}"]
+LLM_PROMPT = "Extract the long card number printed in this image. Reply with the digits only, without spaces."
+
+
+def luhn_valid(number: str) -> bool:
+    """Whether a 13-19 digit string passes the Luhn checksum used by card numbers."""
+    if not number.isdigit() or not 13 <= len(number) <= 19:
+        return False
+    total = 0
+    for position, digit in enumerate(reversed(number)):
+        value = int(digit)
+        if position % 2:
+            value = value * 2 - 9 if value > 4 else value * 2
+        total += value
+    return total % 10 == 0
+
+
+def otsu_threshold(histogram: list) -> int:
+    """Gray level that best separates a 256-bin histogram into two classes."""
+    total = sum(histogram)
+    weighted = sum(level * count for level, count in enumerate(histogram))
+    best, best_variance = 0, -1.0
+    below = below_weighted = 0
+    for level, count in enumerate(histogram):
+        below += count
+        if below == 0:
+            continue
+        above = total - below
+        if above == 0:
+            break
+        below_weighted += level * count
+        mean_below = below_weighted / below
+        mean_above = (weighted - below_weighted) / above
+        variance = below * above * (mean_below - mean_above) ** 2
+        if variance > best_variance:
+            best, best_variance = level, variance
+    return best
+
+
+def preprocess(image: Image.Image, target_width: int = 3000) -> Image.Image:
+    """Grayscale, upscale small images, binarize with Otsu and make the background white."""
+    gray = ImageOps.grayscale(image)
+    scale = max(1, round(target_width / gray.width))
+    if scale > 1:
+        gray = gray.resize((gray.width * scale, gray.height * scale), Image.LANCZOS)
+    threshold = otsu_threshold(gray.histogram())
+    binary = gray.point(lambda level: 255 if level > threshold else 0)
+    # Text covers far less of a card than its background does: light text on dark gets inverted
+    if binary.histogram()[255] * 2 < binary.width * binary.height:
+        binary = ImageOps.invert(binary)
+    return binary
+
+
+def text_rows(data: dict) -> list:
+    """Words from pytesseract.image_to_data grouped into rows by vertical position, each row left to right."""
+    words = sorted(
+        (top + height / 2, height, left, text.strip())
+        for text, left, top, height in zip(data["text"], data["left"], data["top"], data["height"])
+        if text.strip()
+    )
+    rows = []
+    for center, height, left, text in words:
+        if rows and abs(center - rows[-1]["center"]) <= max(height, rows[-1]["height"]) / 2:
+            rows[-1]["words"].append((left, text))
+        else:
+            rows.append({"center": center, "height": height, "words": [(left, text)]})
+    return [[text for _, text in sorted(row["words"])] for row in rows]
+
+
+def card_numbers(rows: list) -> list:
+    """Luhn-valid numbers that fill a whole row or four consecutive 4-digit groups of one, longest first.
+
+    Joining arbitrary runs of words would accept any stray digits that happen
+    to pass Luhn, which one in ten do.
+    """
+    found = set()
+    for words in rows:
+        digits = [part for part in (re.sub(r"\D", "", word) for word in words) if part]
+        candidates = ["".join(digits)]
+        for start in range(len(digits) - 3):
+            group = digits[start:start + 4]
+            if all(len(part) == 4 for part in group):
+                candidates.append("".join(group))
+        found.update(number for number in candidates if luhn_valid(number))
+    return sorted(found, key=len, reverse=True)
+
+
+def ocr_card_number(image: Image.Image):
+    """Card number read locally with Tesseract, or None when nothing passes the Luhn check."""
+    binary = preprocess(image, config.OCR_TARGET_WIDTH)
+    for tesseract_config in TESSERACT_CONFIGS:
+        data = pytesseract.image_to_data(binary, config=tesseract_config, output_type=pytesseract.Output.DICT)
+        numbers = card_numbers(text_rows(data))
+        if numbers:
+            return numbers[0]
+    return None
+
+
+def llm_card_number(content: bytes, mime: str) -> str:
+    """Digits the vision model reads from the image."""
+    token = os.getenv("AIPROXY_TOKEN")
+    if not token:
+        raise RuntimeError("AIPROXY_TOKEN is not set")
+    image_url = f"data:{mime};base64,{base64.b64encode(content).decode()}"
+    body = {
+        "model": config.OCR_LLM_MODEL,
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": LLM_PROMPT},
+            {"type": "image_url", "image_url": {"url": image_url}},
+        ]}],
+    }
+    with httpx.Client(timeout=config.LLM_TIMEOUT * 3) as client:
+        response = client.post(config.LLM_API_URL, headers={"Authorization": f"Bearer {token}"}, json=body)
+        response.raise_for_status()
+    return re.sub(r"\D", "", response.json()["choices"][0]["message"]["content"])
+
+
+class CardNumberCache:
+    """Validated card numbers keyed by the sha256 of the image bytes, one small JSON file per image."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "r") as file:
+                return json.load(file)["number"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, number: str, source: str):
+        with atomic_path(self._path(key)) as tmp_path:
+            with open(tmp_path, "w") as file:
+                json.dump({"number": number, "source": source}, file)
+
+
+_default_cache = None
+
+
+def default_cache() -> CardNumberCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CardNumberCache(os.path.join(config.CACHE_DIR, "ocr"))
+    return _default_cache
+
+
+def extract_card_number(path: str, llm_fallback: bool = None, cache: CardNumberCache = None) -> tuple:
+    """(number, source) for the card number in an image; source is "cache", "ocr" or "llm".
+
+    Local OCR comes first and the LLM is only asked when no Luhn-valid number
+    was read. Raises ValueError when nothing Luhn-valid was found, whether the
+    LLM is disabled or its answer fails the check too.
+    """
+    llm_fallback = config.OCR_LLM_FALLBACK if llm_fallback is None else llm_fallback
+    cache = cache or default_cache()
+    with open(path, "rb") as file:
+        content = file.read()
+    key = hashlib.sha256(content).hexdigest()
+    number = cache.get(key)
+    if number is not None:
+        return number, "cache"
+
+    try:
+        with Image.open(path) as image:
+            number = ocr_card_number(image)
+    except (pytesseract.TesseractError, pytesseract.TesseractNotFoundError, OSError) as e:
+        logging.warning(f"Local OCR failed for {path}: {e}")
+    if number is not None:
+        cache.put(key, number, "ocr")
+        return number, "ocr"
+
+    if not llm_fallback:
+        raise ValueError(f"No valid card number found in {path}")
+    logging.info(f"Local OCR found no valid card number in {path}, asking the LLM")
+    number = llm_card_number(content, mimetypes.guess_type(path)[0] or "image/png")
+    if not luhn_valid(number):
+        raise ValueError(f"LLM card number for {path} fails the Luhn check")
+    cache.put(key, number, "llm")
+    return number, "llm"
@@ -1,3 +1,5 @@
+import os
+
 SYSTEM_PROMPT= """You are an intelligent automation assistant designed to parse, interpret, and execute operational and business tasks given in natural language.  
 Strictly Never add comments to the code.  
 Strictly generate the output in a structured JSON format as follows:  
@@ -74,10 +76,11 @@ SYSTEM_PROMPT3=""" "You are an advanced automation assistant designed to accurat
 ### **Strict Output Format:**  
 Always return a structured JSON object with properly escaped newlines (\n) and double quotes (\") in the "code" field:
 {
+  "python_dependencies": ["<list_of_required_python_libraries>"],
   "language": "<programming_language_used>",
-  "code": "<optimized_and_clean_code>",
-  "python_dependencies": ["<list_of_required_python_libraries>"]
+  "code": "<optimized_and_clean_code>"
 }
+Emit the fields in exactly this order.
 General Rules:
 No comments should be added to the generated code.
 Ensure valid JSON output at all times.
@@ -103,7 +106,107 @@ Web Scraping: beautifulsoup4
 Markdown to HTML: markdown
 CSV/Data Processing: pandas
 File Handling: pathlib
+Built-in helper modules (importable from Python code, prefer them when they fit the task):
+logscan: recent_first_lines(directory, count, suffix=".log") returns the first line of the `count` most recently modified files, newest first.
+sqlquery: query(database, sql, params=()) runs a read-only SQL query over a SQLite file and returns {"columns", "rows"}; scalar(database, sql, params=()) returns the first value. Use it instead of opening SQLite directly.
+jsonsort: sort_file(source, output, keys) sorts a JSON array file of objects by the given keys into `output` (indent=4) in bounded memory; use it for sorting JSON files of any size.
+cardocr: extract_card_number(path) reads a card number from an image locally (Tesseract, Luhn-checked, cached) and asks the LLM only if that fails; returns (number, source).
+dateparse: parse_dates(lines) returns a numpy datetime64 array with python-dateutil semantics, weekdays(dates) gives Monday=0, count_weekday(lines, weekday) counts matching lines; use it for bulk date parsing.
 Bash:
 If the task requires "uv" commands, generate only the necessary Bash command uv is already installed.
 Other Languages:
-Set "language" accordingly."""
\ No newline at end of file
+Set "language" accordingly."""
+
+
+# Plan cache for LLM-generated task code
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", 24 * 60 * 60))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 256))
+
+# LLM client and background job pool
+LLM_API_URL = os.getenv("LLM_API_URL", "http://aiproxy.sanand.workers.dev/openai/v1/chat/completions")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 10))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+# Stream completions and start dependency resolution and execution as plan fields arrive
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+
+# Warm Python executor pool; modules are imported once per worker
+EXECUTOR_POOL_SIZE = int(os.getenv("EXECUTOR_POOL_SIZE", 4))
+EXECUTOR_MAX_RUNS = int(os.getenv("EXECUTOR_MAX_RUNS", 100))
+PRELOAD_MODULES = [
+    "json", "pathlib", "sqlite3", "requests", "httpx", "dateutil.parser", "pytesseract",
+    "pandas", "numpy", "duckdb", "sqlalchemy", "bs4", "markdown", "sqlquery", "jsonsort",
+]
+
+# /read streaming
+READ_CHUNK_SIZE = int(os.getenv("READ_CHUNK_SIZE", 64 * 1024))
+READ_MMAP_THRESHOLD = int(os.getenv("READ_MMAP_THRESHOLD", 16 * 1024 * 1024))
+
+# Built-in handlers for recurring task families, tried before the LLM
+FAST_PATHS_ENABLED = os.getenv("FAST_PATHS_ENABLED", "1") != "0"
+
+# Embedding cache and most-similar-pair search
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_API_URL = os.getenv("EMBEDDING_API_URL", "http://aiproxy.sanand.workers.dev/openai/v1/embeddings")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+SIMILARITY_BLOCK_SIZE = int(os.getenv("SIMILARITY_BLOCK_SIZE", 2048))
+
+# Incremental Markdown H1 index
+DOCS_INDEX_WORKERS = int(os.getenv("DOCS_INDEX_WORKERS", 8))
+
+# Error-feedback repair and speculative candidates
+REPAIR_ENABLED = os.getenv("REPAIR_ENABLED", "1") != "0"
+REPAIR_ERROR_CHARS = int(os.getenv("REPAIR_ERROR_CHARS", 4000))
+# Speculation only takes effect in local mode, where task paths resolve relative to the working directory;
+# under Docker's absolute /data layout outputs cannot be isolated in a scratch tree and tasks run sequentially
+SPECULATIVE_CANDIDATES = int(os.getenv("SPECULATIVE_CANDIDATES", 0))
+SPECULATIVE_TEMPERATURE = float(os.getenv("SPECULATIVE_TEMPERATURE", 0.8))
+REPAIR_PROMPT = """The code you returned failed when it was executed. This is the error output:
+{error}
+Fix the problem and return the complete corrected program in the same JSON format as before."""
+
+# Pooled read-only SQL query service
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", 4))
+SQL_MMAP_SIZE = int(os.getenv("SQL_MMAP_SIZE", 256 * 1024 * 1024))
+SQL_CACHED_STATEMENTS = int(os.getenv("SQL_CACHED_STATEMENTS", 128))
+SQL_DUCKDB_ENABLED = os.getenv("SQL_DUCKDB_ENABLED", "1") != "0"
+SQL_DUCKDB_THRESHOLD = int(os.getenv("SQL_DUCKDB_THRESHOLD", 512 * 1024 * 1024))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", 10000))
+
+# /run/batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+BATCH_MAX_TASKS = int(os.getenv("BATCH_MAX_TASKS", 100))
+
+# Execution limits and admission control; 0 disables a limit
+EXEC_TIMEOUT = float(os.getenv("EXEC_TIMEOUT", 120))
+EXEC_CPU_SECONDS = float(os.getenv("EXEC_CPU_SECONDS", 60))
+EXEC_MEMORY_BYTES = int(os.getenv("EXEC_MEMORY_BYTES", 2 * 1024 * 1024 * 1024))
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", 8))
+MAX_QUEUED_TASKS = int(os.getenv("MAX_QUEUED_TASKS", 32))
+
+# Output of executed code: tail kept per stream for the result, and live buffer per job
+OUTPUT_CAPTURE_BYTES = int(os.getenv("OUTPUT_CAPTURE_BYTES", 1024 * 1024))
+# Output a warm worker's child may spool to its temp files before the run is killed
+OUTPUT_SPOOL_BYTES = int(os.getenv("OUTPUT_SPOOL_BYTES", 256 * 1024 * 1024))
+JOB_OUTPUT_CHARS = int(os.getenv("JOB_OUTPUT_CHARS", 64 * 1024))
+
+# Background prewarm after startup: executor workers, helper modules, package index, plan cache
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "1") != "0"
+PREWARM_DELAY = float(os.getenv("PREWARM_DELAY", 0.5))
+PREWARM_MODULES = ["dateparse", "similarity", "duckdb"]
+PREWARM_PRETTIER = os.getenv("PREWARM_PRETTIER", "1") != "0"
+
+# External JSON sort: memory budget before spilling sorted runs to disk, and where runs go
+SORT_MEMORY_BYTES = int(os.getenv("SORT_MEMORY_BYTES", 256 * 1024 * 1024))
+SORT_TEMP_DIR = os.getenv("SORT_TEMP_DIR") or None
+
+# Persistent Prettier daemon used instead of spawning npx for each format task
+PRETTIER_NODE = os.getenv("PRETTIER_NODE", "node")
+PRETTIER_TIMEOUT = float(os.getenv("PRETTIER_TIMEOUT", 30))
+
+# Local card-number OCR: Tesseract first, vision LLM only when no Luhn-valid number is read
+OCR_TARGET_WIDTH = int(os.getenv("OCR_TARGET_WIDTH", 3000))
+OCR_LLM_FALLBACK = os.getenv("OCR_LLM_FALLBACK", "1") != "0"
+OCR_LLM_MODEL = os.getenv("OCR_LLM_MODEL", "gpt-4o-mini")
@@ -0,0 +1,133 @@
+import re
+import string
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+from dateutil.parser import parse as dateutil_parse
+
+MONTHS = {}
+for number, names in enumerate(
+    [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+     ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+     ("dec", "december")],
+    start=1,
+):
+    MONTHS.update({name: number for name in names})
+
+# Layouts dateutil reads unambiguously; the capture groups name the field order
+LAYOUTS = [
+    re.compile(r"(?P<year>9{4})(?P<sep>[-/.])(?P<month>9{1,2})(?P=sep)(?P<day>9{1,2})"),
+    re.compile(r"(?P<month>9{1,2})(?P<sep>[-/.])(?P<day>9{1,2})(?P=sep)(?P<year>9{4})"),
+    re.compile(r"(?P<day>9{1,2})(?P<sep>[- ])(?P<name>a{3,9})(?P=sep)(?P<year>9{4})"),
+    re.compile(r"(?P<name>a{3,9}) (?P<day>9{1,2}),? (?P<year>9{4})"),
+]
+TIME = re.compile(r"(?:[ T](?P<hour>9{2}):(?P<minute>9{2})(?::(?P<second>9{2}))?)?")
+
+
+SHAPE_TABLE = str.maketrans("0123456789" + string.ascii_letters, "9" * 10 + "a" * len(string.ascii_letters))
+
+
+def line_shape(line: str) -> str:
+    """Digits become 9 and letters become a, e.g. `Jul 25, 2003` -> `aaa 99, 9999`."""
+    return line.translate(SHAPE_TABLE)
+
+
+@lru_cache(maxsize=1024)
+def infer_layout(shape: str):
+    """Field spans for a line shape, or None if only dateutil should handle it."""
+    for layout in LAYOUTS:
+        found = layout.match(shape)
+        if not found:
+            continue
+        time = TIME.fullmatch(shape, found.end())
+        if not time:
+            continue
+        spans = {field: found.span(field) for field in ("year", "month", "day", "name") if found.groupdict().get(field)}
+        spans.update({field: time.span(field) for field in ("hour", "minute", "second") if time.group(field)})
+        return tuple(sorted(spans.items()))
+    return None
+
+
+def _numbers(codes: np.ndarray, span) -> np.ndarray:
+    start, end = span
+    digits = codes[:, start:end].astype(np.int64) - 48
+    return digits @ (10 ** np.arange(end - start - 1, -1, -1, dtype=np.int64))
+
+
+def _month_numbers(codes: np.ndarray, span) -> np.ndarray:
+    start, end = span
+    names = np.char.lower(np.ascontiguousarray(codes[:, start:end]).view(f"<U{end - start}").ravel())
+    unique, inverse = np.unique(names, return_inverse=True)
+    return np.array([MONTHS.get(name, 0) for name in unique], dtype=np.int64)[inverse]
+
+
+def _parse_group(lines: list, layout) -> np.ndarray:
+    """Parse same-shape lines at once; rows that are not valid dates come back as NaT."""
+    spans = dict(layout)
+    width = len(lines[0])
+    codes = np.array(lines, dtype=f"<U{width}").view(np.uint32).reshape(len(lines), width)
+    years = _numbers(codes, spans["year"])
+    months = _month_numbers(codes, spans["name"]) if "name" in spans else _numbers(codes, spans["month"])
+    days = _numbers(codes, spans["day"])
+
+    valid = (months >= 1) & (months <= 12) & (days >= 1)
+    month_start = ((years - 1970) * 12 + np.clip(months, 1, 12) - 1).astype("datetime64[M]")
+    month_length = ((month_start + 1).astype("datetime64[D]") - month_start.astype("datetime64[D]")).astype(np.int64)
+    valid &= days <= month_length
+    seconds = np.zeros(len(lines), dtype=np.int64)
+    for field, factor, limit in (("hour", 3600, 24), ("minute", 60, 60), ("second", 1, 60)):
+        if field in spans:
+            values = _numbers(codes, spans[field])
+            valid &= values < limit
+            seconds += values * factor
+    result = month_start.astype("datetime64[s]") + (days - 1) * 86400 + seconds
+    result[~valid] = np.datetime64("NaT")
+    return result
+
+
+def _fallback(line: str) -> np.datetime64:
+    parsed = dateutil_parse(line)
+    return np.datetime64(parsed.replace(tzinfo=None), "s")
+
+
+def parse_dates(lines: list) -> np.ndarray:
+    """Parse date strings into datetime64[s] with dateutil's default (month-first) semantics.
+
+    Lines are grouped by shape; known shapes are parsed as vectorized batches
+    and anything else, or any row that is not a valid date in the inferred
+    layout, goes through dateutil. Unparseable lines raise like dateutil does.
+    """
+    lines = [line.strip() for line in lines]
+    result = np.empty(len(lines), dtype="datetime64[s]")
+    groups = {}
+    for row, line in enumerate(lines):
+        groups.setdefault(line_shape(line), []).append(row)
+    for shape, rows in groups.items():
+        layout = infer_layout(shape)
+        if layout is None:
+            result[rows] = [_fallback(lines[row]) for row in rows]
+            continue
+        parsed = _parse_group([lines[row] for row in rows], layout)
+        for index in np.flatnonzero(np.isnat(parsed)):
+            parsed[index] = _fallback(lines[rows[index]])
+        result[rows] = parsed
+    return result
+
+
+def weekdays(dates: np.ndarray) -> np.ndarray:
+    """Monday=0 ... Sunday=6, like datetime.weekday()."""
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    # 1970-01-01 was a Thursday
+    return (days + 3) % 7
+
+
+def count_weekday(lines, weekday: int, batch_size: int = 1_000_000) -> int:
+    """Count lines whose date falls on `weekday`, parsing in batches of `batch_size`."""
+    lines = (line for line in lines if line.strip())
+    total = 0
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return total
+        total += int(np.count_nonzero(weekdays(parse_dates(batch)) == weekday))
@@ -0,0 +1,136 @@
+import hashlib
+import importlib.metadata
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+
+def canonical_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirement(spec: str):
+    """Split a requirement like `pandas[excel]==2.2` into (name, extras, pinned version or None, rest)."""
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[([^\]]*)\])?\s*(.*?)\s*$", spec)
+    if not match:
+        return None, [], None, spec
+    name, extras, rest = match.groups()
+    pin = re.fullmatch(r"==\s*([A-Za-z0-9.+!*-]+)", rest)
+    extras = [canonical_name(extra.strip()) for extra in (extras or "").split(",") if extra.strip()]
+    return canonical_name(name), extras, pin.group(1) if pin else None, rest
+
+
+class PackageIndex:
+    """In-process index of the distributions and modules available to generated code."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = None
+        self._modules = None
+
+    def load(self):
+        """Scan the installed distributions now rather than on the first lookup."""
+        self._load()
+
+    def _load(self):
+        with self._lock:
+            if self._versions is not None:
+                return
+            versions = {}
+            for dist in importlib.metadata.distributions():
+                name = dist.metadata["Name"]
+                if name:
+                    versions.setdefault(canonical_name(name), dist.version)
+            self._modules = {canonical_name(module) for module in importlib.metadata.packages_distributions()}
+            self._modules.update(canonical_name(module) for module in sys.stdlib_module_names)
+            self._versions = versions
+
+    def satisfied(self, spec: str) -> bool:
+        """True if the requirement is already importable without running pip."""
+        self._load()
+        name, extras, pin, rest = parse_requirement(spec)
+        # Extras pull in packages of their own (requests[socks] needs PySocks): leave them to the installer
+        if name is None or extras:
+            return False
+        if name in self._versions:
+            if pin is not None:
+                return self._versions[name] == pin
+            # Ranges need a real resolver; only bare names are settled here
+            return not rest
+        # The LLM often lists import names (`dateutil`, `bs4`) or stdlib modules
+        return not rest and name in self._modules
+
+
+class DependencyResolver:
+    """Builds one package directory per missing dependency set and reuses it.
+
+    Directories are created with `uv pip install --target` (pip if uv is
+    missing) under `directory`, keyed by the dependency set, so repeated sets
+    cost nothing. Concurrent requests for the same set share a single install.
+    """
+
+    def __init__(self, directory: str, index: PackageIndex):
+        self.directory = directory
+        self.index = index
+        self._lock = threading.Lock()
+        self._building = {}
+
+    def key(self, requirements: list) -> str:
+        normalized = sorted({re.sub(r"\s+", "", spec.lower()) for spec in requirements})
+        material = f"{sys.version_info[:2]}\n" + "\n".join(normalized)
+        return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+    def resolve(self, dependencies: list) -> list:
+        """Return extra sys.path entries that make `dependencies` importable."""
+        missing = [spec for spec in dependencies if not self.index.satisfied(spec)]
+        if not missing:
+            logging.info(f"Dependencies already installed: {dependencies}")
+            return []
+        target = os.path.join(self.directory, self.key(missing))
+        if os.path.exists(os.path.join(target, ".complete")):
+            logging.info(f"Reusing cached environment for {missing}")
+            return [target]
+
+        with self._lock:
+            build = self._building.get(target)
+            owner = build is None
+            if owner:
+                build = self._building[target] = {"done": threading.Event(), "error": None}
+        if not owner:
+            build["done"].wait()
+            if build["error"] is not None:
+                raise build["error"]
+            return [target]
+
+        try:
+            self._install(missing, target)
+        except Exception as e:
+            build["error"] = e
+            raise
+        finally:
+            build["done"].set()
+            with self._lock:
+                self._building.pop(target, None)
+        return [target]
+
+    def _install(self, requirements: list, target: str):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(target), prefix=f".{os.path.basename(target)}.")
+        if shutil.which("uv"):
+            command = ["uv", "pip", "install", "--python", sys.executable, "--target", staging]
+        else:
+            command = [sys.executable, "-m", "pip", "install", "--target", staging]
+        logging.info(f"Building environment for {requirements} in {target}")
+        try:
+            subprocess.run(command + requirements, check=True, capture_output=True, text=True)
+            with open(os.path.join(staging, ".complete"), "w") as file:
+                file.write("\n".join(requirements))
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from atomicfile import atomic_path
+import config
+
+
+def first_heading(path: str):
+    """Title of the first H1 in a Markdown file; stops reading as soon as it is found."""
+    with open(path, "r", encoding="utf-8", errors="replace", buffering=16 * 1024) as file:
+        for line in file:
+            if line.startswith("# "):
+                return line[2:].strip()
+    return None
+
+
+def markdown_files(directory: str, prefix: str = ""):
+    """Yield (relative path, stat) for every .md file below a directory."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from markdown_files(entry.path, f"{relative}/")
+            elif entry.name.endswith(".md") and entry.is_file():
+                yield relative, entry.stat()
+
+
+class MarkdownIndexer:
+    """Keeps an H1 index of a docs tree up to date, re-reading only changed files.
+
+    The mtime and size of every file seen, with its title, is kept in a state
+    file under `state_dir`; changed files are scanned in parallel.
+    """
+
+    def __init__(self, state_dir: str, workers: int):
+        self.state_dir = state_dir
+        self.workers = workers
+        self._lock = threading.Lock()
+        os.makedirs(self.state_dir, exist_ok=True)
+
+    def _state_path(self, directory: str, output: str) -> str:
+        key = hashlib.sha256(f"{os.path.abspath(directory)}\n{os.path.abspath(output)}".encode()).hexdigest()[:32]
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    def _load_state(self, path: str) -> dict:
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {"files": {}, "output": None}
+
+    def update(self, directory: str, output: str) -> dict:
+        """Bring `output` in line with the docs tree and return the index."""
+        with self._lock:
+            state_path = self._state_path(directory, output)
+            state = self._load_state(state_path)
+            known = state["files"]
+            current = {relative: [stat.st_mtime_ns, stat.st_size] for relative, stat in markdown_files(directory)}
+            changed = [relative for relative, signature in current.items() if known.get(relative, [None, None])[:2] != signature]
+            removed = known.keys() - current.keys()
+
+            if changed:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    titles = pool.map(lambda relative: first_heading(os.path.join(directory, relative)), changed)
+                    for relative, title in zip(changed, titles):
+                        known[relative] = current[relative] + [title]
+            for relative in removed:
+                del known[relative]
+
+            index = {relative: entry[2] for relative, entry in sorted(known.items()) if entry[2] is not None}
+            if changed or removed or not self._output_unchanged(output, state["output"]):
+                logging.info(f"Markdown index: {len(changed)} changed, {len(removed)} removed, {len(current)} files")
+                write_json_atomic(output, index)
+                stat = os.stat(output)
+                state["output"] = [stat.st_mtime_ns, stat.st_size]
+                write_json_atomic(state_path, state, indent=None)
+            return index
+
+    @staticmethod
+    def _output_unchanged(output: str, signature) -> bool:
+        try:
+            stat = os.stat(output)
+        except FileNotFoundError:
+            return False
+        return signature == [stat.st_mtime_ns, stat.st_size]
+
+
+def write_json_atomic(path: str, data, indent=4):
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=indent)
+
+
+_default_indexer = None
+
+
+def default_indexer() -> MarkdownIndexer:
+    global _default_indexer
+    if _default_indexer is None:
+        _default_indexer = MarkdownIndexer(os.path.join(config.CACHE_DIR, "docs-index"), config.DOCS_INDEX_WORKERS)
+    return _default_indexer
@@ -8,6 +8,8 @@
 #     "python-dateutil",
 # ]
 # ///
+import asyncio
+import contextvars
 import hashlib
 import httpx
 import json
@@ -16,6 +18,8 @@ import numpy as np
 import os
 import re
 import subprocess
+import time
+from contextlib import asynccontextmanager
 from dateutil.parser import parse
 from datagen import (
     get_markdown,
@@ -32,6 +36,11 @@ from datagen import (
 
 openai_api_base = os.getenv("OPENAI_API_BASE", "https://aiproxy.sanand.workers.dev/openai/v1")
 openai_api_key = os.getenv("OPENAI_API_KEY")
+agent_url = os.getenv("AGENT_URL", "http://localhost:8000")
+
+# Benchmark mode shares one pooled client and records per-stage timings per task
+shared_client = None
+stage_timings = contextvars.ContextVar("stage_timings", default=None)
 
 
 def num(str):
@@ -43,10 +52,35 @@ def mismatch(msg, expected, result):
     return False
 
 
+@asynccontextmanager
+async def agent_client():
+    if shared_client is not None:
+        yield shared_client
+    else:
+        async with httpx.AsyncClient(timeout=30) as client:
+            yield client
+
+
+def record_stage(stage: str, seconds: float, response: httpx.Response = None):
+    timings = stage_timings.get()
+    if timings is None:
+        return
+    timings.append((stage, seconds))
+    # Server-side stages, if the agent reports them, e.g. `llm;dur=812.4, exec;dur=95.1`
+    header = response.headers.get("server-timing", "") if response is not None else ""
+    for metric in filter(None, (part.strip() for part in header.split(","))):
+        name, _, params = metric.partition(";")
+        duration = re.search(r"dur=([\d.]+)", params)
+        if duration:
+            timings.append((f"{stage}.{name.strip()}", float(duration.group(1)) / 1000))
+
+
 async def run(task: str):
-    async with httpx.AsyncClient(timeout=30) as client:
+    async with agent_client() as client:
         logging.warning(f"🟡 Running task: {task.strip()}")
-        response = await client.post("http://localhost:8000/run", params={"task": task})
+        start = time.perf_counter()
+        response = await client.post(f"{agent_url}/run", params={"task": task})
+        record_stage("run", time.perf_counter() - start, response)
         try:
             response_text = json.dumps(response.json(), indent=2)
         except json.JSONDecodeError:
@@ -59,8 +93,10 @@ async def run(task: str):
 
 
 async def read(path: str):
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(f"http://localhost:8000/read?path={path}")
+    async with agent_client() as client:
+        start = time.perf_counter()
+        response = await client.get(f"{agent_url}/read", params={"path": path})
+        record_stage("read", time.perf_counter() - start, response)
         if response.status_code != 200:
             raise Exception(f"Cannot read {path}")
         return response.text
@@ -232,9 +268,95 @@ async def a10(email, **kwargs):
     return True
 
 
+TASKS = [a1, a2, a3, a4, a5, a6, a7, a8, a9, a10]
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": float(np.mean(values)),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(np.max(values)),
+    }
+
+
+def parse_mix(mix: str) -> list:
+    """`a3,a4=2` -> [a3, a4, a4]: each task name with an optional integer weight."""
+    by_name = {task.__name__: task for task in TASKS}
+    tasks = []
+    for item in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in by_name:
+            raise ValueError(f"Unknown task {name!r}; choose from {', '.join(by_name)}")
+        tasks += [by_name[name]] * int(weight or 1)
+    return tasks
+
+
+async def bench_one(task, email: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        timings = []
+        stage_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            success = await task(email=email)
+        except Exception as e:
+            logging.error(f"🔴 {task.__name__.upper()} failed: {e}")
+            success = False
+        return task.__name__, bool(success), time.perf_counter() - start, timings
+
+
+async def benchmark(email: str, concurrency: int, repeat: int, mix: str, report: str = None):
+    """Run the task mix `repeat` times with up to `concurrency` tasks in flight and report latencies."""
+    global shared_client
+    jobs = parse_mix(mix) * repeat
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        shared_client = client
+        try:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(bench_one(task, email, semaphore) for task in jobs))
+            wall = time.perf_counter() - start
+        finally:
+            shared_client = None
+
+    per_task, per_stage = {}, {}
+    for name, success, seconds, timings in results:
+        entry = per_task.setdefault(name, {"passed": 0, "failed": 0, "latencies": []})
+        entry["passed" if success else "failed"] += 1
+        entry["latencies"].append(seconds)
+        for stage, stage_seconds in timings:
+            per_stage.setdefault(stage, []).append(stage_seconds)
+    result = {
+        "config": {"concurrency": concurrency, "repeat": repeat, "mix": mix, "agent_url": agent_url},
+        "wall_seconds": wall,
+        "throughput_per_second": len(results) / wall if wall else 0.0,
+        "passed": sum(1 for _, success, _, _ in results if success),
+        "total": len(results),
+        "latency": percentiles([seconds for _, _, seconds, _ in results]),
+        "tasks": {
+            name: {"passed": entry["passed"], "failed": entry["failed"], "latency": percentiles(entry["latencies"])}
+            for name, entry in sorted(per_task.items())
+        },
+        "stages": {stage: percentiles(values) for stage, values in sorted(per_stage.items())},
+    }
+    text = json.dumps(result, indent=2)
+    if report:
+        with open(report, "w") as file:
+            file.write(text + "\n")
+        logging.info(f"📊 Benchmark report written to {report}")
+    print(text)
+    return result
+
+
 async def main(email: str):
     score, total = 0, 0
-    for task in [a1, a2, a3, a4, a5, a6, a7, a8, a9, a10]:
+    for task in TASKS:
         total += 1
         try:
             success = await task(email=email)
@@ -250,13 +372,20 @@ async def main(email: str):
 
 
 if __name__ == "__main__":
-    import asyncio
     import argparse
 
     parser = argparse.ArgumentParser(description="Evaluate tasks with configurable logging")
     parser.add_argument("--email", default="user@example.com", help="Set the email address")
     levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
     parser.add_argument("--log-level", default="INFO", choices=levels, help="Set logging level")
+    parser.add_argument("--benchmark", action="store_true", help="Run the load-testing benchmark instead of a single pass")
+    parser.add_argument("--concurrency", type=int, default=4, help="Benchmark: tasks in flight at once")
+    parser.add_argument("--repeat", type=int, default=5, help="Benchmark: how many times to run the task mix")
+    parser.add_argument("--mix", default="a3,a4,a5,a6,a10", help="Benchmark: tasks to run, e.g. `a3,a4=2`")
+    parser.add_argument("--report", help="Benchmark: write the JSON report to this file")
     args = parser.parse_args()
     logging.basicConfig(level=args.log_level, format="%(message)s\n")
-    asyncio.run(main(args.email))
\ No newline at end of file
+    if args.benchmark:
+        asyncio.run(benchmark(args.email, args.concurrency, args.repeat, args.mix, args.report))
+    else:
+        asyncio.run(main(args.email))
\ No newline at end of file
@@ -0,0 +1,285 @@
+import codecs
+import json
+import logging
+import os
+import queue
+import select
+import selectors
+import subprocess
+import sys
+import threading
+import time
+
+from executor_worker import Tail, apply_limits, exit_message, kill_group, wait_child
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "executor_worker.py")
+WORKER_GRACE_SECONDS = 10
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+class Cancellation:
+    """Lets another thread stop one run: its process group is killed as soon as it is known."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._child = None
+        self.cancelled = False
+
+    def started(self, pid: int):
+        with self._lock:
+            self._child = pid
+            if self.cancelled:
+                kill_group(pid)
+
+    def finished(self):
+        with self._lock:
+            self._child = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._child is not None:
+                kill_group(self._child)
+
+
+class Worker:
+    """A warm Python process that has already imported the preload modules."""
+
+    def __init__(self, modules: list):
+        self.runs = 0
+        # Process group of the forked child running the current request, if any
+        self.child = None
+        self.proc = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, *modules],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        # Lines are split here rather than by a buffered reader so select() sees every pending byte
+        self._pending = b""
+        if self._receive().get("ready") is not True:
+            self.kill()
+            raise WorkerCrashed("Executor worker failed to start")
+
+    def _receive(self, timeout: float = None) -> dict:
+        deadline = time.monotonic() + timeout if timeout else None
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._pending:
+            if deadline is not None and not select.select([fd], [], [], max(deadline - time.monotonic(), 0))[0]:
+                raise WorkerCrashed(f"Executor worker did not answer within {timeout:g}s")
+            data = os.read(fd, 64 * 1024)
+            if not data:
+                raise WorkerCrashed(f"Executor worker exited with code {self.proc.poll()}")
+            self._pending += data
+        line, self._pending = self._pending.split(b"\n", 1)
+        return json.loads(line)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, code: str, cwd=None, paths=None, limits: dict = None, on_output=None,
+            cancel: Cancellation = None) -> dict:
+        self.runs += 1
+        limits = limits or {}
+        request = {"code": code, "cwd": cwd, "paths": paths or [], "limits": limits, "stream": on_output is not None}
+        try:
+            self.proc.stdin.write(json.dumps(request).encode() + b"\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashed(f"Executor worker is gone: {e}")
+        # The worker enforces the timeout itself; this only guards against a stuck worker
+        deadline = time.monotonic() + limits["timeout"] + WORKER_GRACE_SECONDS if limits.get("timeout") else None
+        while True:
+            message = self._receive(None if deadline is None else max(deadline - time.monotonic(), 0.001))
+            if "started" in message:
+                self.child = message["started"]
+                if cancel is not None:
+                    cancel.started(self.child)
+            elif "output" in message:
+                on_output(message["output"]["stream"], message["output"]["text"])
+            else:
+                if cancel is not None:
+                    cancel.finished()
+                self.child = None
+                return message
+
+    def kill(self):
+        """Kill the worker and whatever its current child started; safe to call from another thread."""
+        child = self.child
+        if child is not None:
+            # The child leads its own session, so killing the worker alone would leave it running
+            kill_group(child)
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class ExecutorPool:
+    """Pool of warm Python workers; each run happens in a fresh fork of a worker.
+
+    Workers are started on demand up to `size` and recycled after `max_runs`
+    runs or as soon as one crashes. `limits` ("timeout", "cpu_seconds",
+    "memory_bytes"; 0 for none) apply to every run.
+    """
+
+    def __init__(self, size: int, max_runs: int, modules: list, limits: dict = None):
+        self.size = size
+        self.max_runs = max_runs
+        self.modules = modules
+        self.limits = limits or {}
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _acquire(self) -> Worker:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._count < self.size:
+                    self._count += 1
+                    break
+            # Wake up periodically in case a recycled worker freed a slot
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        try:
+            return Worker(self.modules)
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+
+    def _release(self, worker: Worker, healthy: bool):
+        if healthy and worker.alive() and worker.runs < self.max_runs:
+            self._idle.put(worker)
+            return
+        worker.kill()
+        with self._lock:
+            self._count -= 1
+
+    def warm(self):
+        """Start every worker ahead of the first request."""
+        workers = [self._acquire() for _ in range(self.size)]
+        for worker in workers:
+            self._release(worker, True)
+
+    def reserve(self) -> Worker:
+        """Take a worker ahead of time; hand it to `run` or give it back with `release`."""
+        return self._acquire()
+
+    def release(self, worker: Worker):
+        self._release(worker, True)
+
+    def run(self, code: str, cwd=None, paths=None, worker: Worker = None, on_output=None,
+            cancel: Cancellation = None):
+        """Run Python code in a warm worker; returns (returncode, stdout, stderr, usage).
+
+        A worker taken with `reserve` can be passed in and is returned to the pool
+        afterwards. `on_output(stream, text)` receives output while the code runs,
+        and `cancel` can kill the run from another thread.
+        """
+        worker = worker or self._acquire()
+        healthy = False
+        try:
+            result = worker.run(code, cwd, paths, self.limits, on_output, cancel)
+            healthy = True
+            return result["returncode"], result["stdout"], result["stderr"], result.get("usage")
+        except (WorkerCrashed, ValueError) as e:
+            logging.error(f"Executor worker crashed, recycling it: {e}")
+            return -1, "", f"Executor worker crashed: {e}", None
+        finally:
+            self._release(worker, healthy)
+
+    def close(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+            with self._lock:
+                self._count -= 1
+
+
+def run_command(command: list, env=None, cwd=None, limits: dict = None, on_output=None,
+                cancel: Cancellation = None):
+    """Run a command to completion; returns (returncode, stdout, stderr, usage).
+
+    The command leads its own process group, the CPU and memory rlimits in
+    `limits` are set on it with prlimit right after it starts, and the whole
+    group is killed once it exits or its timeout passes. Output is read as it
+    arrives, passed to `on_output(stream, text)` and only its last
+    `output_bytes` are kept. `cancel` can kill it from another thread. The
+    child is reaped with os.wait4 so its own CPU time and peak RSS are known;
+    usage is None where wait4 is unavailable.
+    """
+    limits = limits or {}
+    timeout = limits.get("timeout") or None
+    if not hasattr(os, "wait4"):
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=cwd, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            stderr = e.stderr.decode("utf-8", errors="replace") if isinstance(e.stderr, bytes) else e.stderr or ""
+            return -9, "", f"{stderr.rstrip()}\n{exit_message(-9, True, timeout)}".lstrip(), None
+        return result.returncode, result.stdout, result.stderr, None
+
+    # No preexec_fn: it is unsafe in a process with threads, so limits are set from outside after the spawn
+    proc = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, cwd=cwd, start_new_session=True,
+    )
+    try:
+        apply_limits(limits.get("cpu_seconds", 0), limits.get("memory_bytes", 0), pid=proc.pid)
+    except (ProcessLookupError, OSError) as e:
+        logging.warning(f"Could not set limits on pid {proc.pid}: {e}")
+    if cancel is not None:
+        cancel.started(proc.pid)
+    deadline = time.monotonic() + timeout if timeout else None
+    timed_out = False
+    names = {proc.stdout: "stdout", proc.stderr: "stderr"}
+    output = {pipe: Tail(limits.get("output_bytes", 0)) for pipe in names}
+    decoders = {pipe: codecs.getincrementaldecoder("utf-8")(errors="replace") for pipe in names}
+    with selectors.DefaultSelector() as selector:
+        for pipe in output:
+            selector.register(pipe, selectors.EVENT_READ)
+        while selector.get_map():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, 64 * 1024)
+                if data:
+                    output[key.fileobj].write(data)
+                    if on_output is not None:
+                        text = decoders[key.fileobj].decode(data)
+                        if text:
+                            on_output(names[key.fileobj], text)
+                else:
+                    selector.unregister(key.fileobj)
+    for pipe in output:
+        pipe.close()
+    if timed_out:
+        kill_group(proc.pid)
+        _, status, usage = os.wait4(proc.pid, 0)
+    else:
+        # Output is closed, but the process itself may still be running
+        remaining = max(deadline - time.monotonic(), 0.001) if deadline is not None else 0
+        status, usage, timed_out = wait_child(proc.pid, remaining)
+    if cancel is not None:
+        cancel.finished()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stdout, stderr = (output[pipe].text() for pipe in (proc.stdout, proc.stderr))
+    message = exit_message(proc.returncode, timed_out, timeout)
+    if message:
+        stderr = f"{stderr.rstrip()}\n{message}".lstrip()
+    return proc.returncode, stdout, stderr, {
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        "max_rss_bytes": usage.ru_maxrss * 1024,
+        "timed_out": timed_out,
+    }
@@ -0,0 +1,311 @@
+"""Warm Python executor worker.
+
+Started by executor_pool with the modules to preload as arguments. It imports
+them once, then reads one JSON request per line on stdin and answers with one
+JSON line on stdout. Every request runs in a freshly forked child so generated
+code gets the preloaded libraries without being able to pollute the worker.
+Children lead their own process group, so a timeout kills everything they
+started, and run under the CPU and memory rlimits sent with the request. Their
+output is spooled to temp files and the run is killed once it outgrows
+`spool_bytes`. Only the tail of it is kept; streaming requests also get it
+forwarded as `{"output": ...}` lines while the child runs. A `{"started": pid}`
+line names each child as soon as it is forked, so the pool can kill its
+process group if the worker itself has to be killed.
+"""
+import codecs
+import importlib
+import json
+import os
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def preload(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            sys.stderr.write(f"executor_worker: could not preload {name}: {e}\n")
+
+
+def apply_limits(cpu_seconds: float = 0, memory_bytes: int = 0, pid: int = 0):
+    """Set rlimits on the current process, or on `pid` from outside it; 0 leaves a limit unset.
+
+    Memory is capped with RLIMIT_DATA rather than RLIMIT_AS, so the address
+    space that V8 or malloc arenas reserve without using does not count.
+    """
+    if resource is None or (pid and not hasattr(resource, "prlimit")):
+        return
+    set_limit = (lambda which, limits: resource.prlimit(pid, which, limits)) if pid else resource.setrlimit
+    if cpu_seconds:
+        seconds = max(1, int(cpu_seconds + 0.999))
+        # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+        set_limit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+    if memory_bytes:
+        set_limit(resource.RLIMIT_DATA, (memory_bytes, memory_bytes))
+
+
+def kill_group(pgid: int):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def exit_message(returncode: int, timed_out: bool, timeout: float) -> str:
+    """Explanation appended to stderr when the run was cut short."""
+    if timed_out:
+        return f"Execution timed out after {timeout:g}s and was killed."
+    if returncode == -signal.SIGXCPU:
+        return "CPU time limit exceeded."
+    if returncode < 0:
+        try:
+            name = signal.Signals(-returncode).name
+        except ValueError:
+            name = f"signal {-returncode}"
+        return f"Process was killed by {name}."
+    return ""
+
+
+def wait_child(pid: int, timeout: float = 0, tick=None, interval: float = 0.1) -> tuple:
+    """Reap a child that leads its own process group, killing the group after `timeout` seconds.
+
+    `tick` is called every `interval` seconds while the child runs. Returns
+    (status, usage, timed_out). The group is killed in any case so nothing the
+    child started outlives it.
+    """
+    timed_out = False
+    deadline = time.monotonic() + timeout if timeout else None
+    if (timeout or tick) and hasattr(os, "pidfd_open"):
+        fd = os.pidfd_open(pid)
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+                wait = remaining if tick is None else min(interval, remaining or interval)
+                if select.select([fd], [], [], wait)[0]:
+                    break
+                if tick is not None:
+                    tick()
+        finally:
+            os.close(fd)
+    elif timeout or tick:
+        last_tick = time.monotonic()
+        while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                timed_out = True
+                break
+            if tick is not None and now - last_tick >= interval:
+                tick()
+                last_tick = now
+            time.sleep(0.01)
+    else:
+        os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+    # The child is not reaped yet, so its process group id cannot have been reused
+    kill_group(pid)
+    _, status, usage = os.wait4(pid, 0)
+    return status, usage, timed_out
+
+
+class Tail:
+    """The last `limit` bytes written to it (everything when limit is 0)."""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.data = bytearray()
+        self.dropped = 0
+
+    def write(self, data: bytes):
+        self.data += data
+        # Trim in batches so a chatty stream is not copied on every write
+        if self.limit and len(self.data) > 2 * self.limit:
+            excess = len(self.data) - self.limit
+            del self.data[:excess]
+            self.dropped += excess
+
+    def skip(self, count: int):
+        """Record `count` bytes that were never written; everything older goes too."""
+        self.dropped += len(self.data) + count
+        self.data.clear()
+
+    def text(self) -> str:
+        data = self.data[-self.limit:] if self.limit else self.data
+        dropped = self.dropped + len(self.data) - len(data)
+        text = bytes(data).decode("utf-8", errors="replace")
+        return f"[... {dropped} bytes of output truncated ...]\n{text}" if dropped else text
+
+
+class Follower:
+    """Picks up what a child has appended to one of its output files since the last poll."""
+
+    def __init__(self, fd: int, stream: str, tail: Tail, emit=None, keep: int = 0):
+        self.fd = fd
+        self.stream = stream
+        self.tail = tail
+        self.emit = emit
+        self.keep = keep
+        self.offset = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def poll(self, final: bool = False):
+        size = os.fstat(self.fd).st_size
+        if self.keep and size - self.offset > self.keep:
+            # Too much to keep up with: only the newest bytes matter
+            skipped = size - self.offset - self.keep
+            self.offset += skipped
+            self.tail.skip(skipped)
+            self.decoder.reset()
+            if self.emit is not None:
+                self.emit(self.stream, f"[... {skipped} bytes of output skipped ...]\n")
+        # Stop at the size seen above so a child that keeps writing cannot keep the poll going
+        while final or self.offset < size:
+            data = os.pread(self.fd, 64 * 1024 if final else min(64 * 1024, size - self.offset), self.offset)
+            if not data:
+                break
+            self.offset += len(data)
+            self.tail.write(data)
+            if self.emit is not None:
+                text = self.decoder.decode(data)
+                if text:
+                    self.emit(self.stream, text)
+        if final and self.emit is not None:
+            text = self.decoder.decode(b"", final=True)
+            if text:
+                self.emit(self.stream, text)
+
+
+def run_child(code: str, cwd, paths, stdout_fd: int, stderr_fd: int, limits: dict, stream: bool = False):
+    """Body of the forked child; never returns."""
+    status = 0
+    try:
+        os.setsid()
+        apply_limits(limits.get("cpu_seconds", 0), limits.get("memory_bytes", 0))
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        sys.stdin = open(0, "r", closefd=False)
+        # Line buffering lets streamed output show up as it is printed
+        sys.stdout = open(1, "w", buffering=1 if stream else -1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1 if stream else -1, closefd=False)
+        if cwd:
+            os.chdir(cwd)
+        # Mirror `python -c` so generated code sees the same environment
+        sys.argv = ["-c"]
+        sys.path[:0] = ["", *paths]
+        namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+        exec(compile(code, "<string>", "exec"), namespace)
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except BaseException:
+        # Drop this module's frame so tracebacks read like `python -c`
+        etype, value, tb = sys.exc_info()
+        traceback.print_exception(etype, value, tb.tb_next)
+        status = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(status)
+
+
+def run(request: dict, emit=None, started=None) -> dict:
+    """Run one request in a forked child; `emit(stream, text)` gets its output as it is written.
+
+    `started(pid)` is told the child's pid, which is also its process group id.
+    """
+    limits = request.get("limits") or {}
+    stream = bool(request.get("stream")) and emit is not None
+    limit = limits.get("output_bytes", 0)
+    spool = limits.get("spool_bytes", 0)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        pid = os.fork()
+        if pid == 0:
+            run_child(request["code"], request.get("cwd"), request.get("paths") or [], out.fileno(), err.fileno(),
+                      limits, stream)
+        if started is not None:
+            started(pid)
+        tails = {"stdout": Tail(limit), "stderr": Tail(limit)}
+        followers = [
+            Follower(file.fileno(), name, tails[name], emit if stream else None, max(limit, 64 * 1024) if limit else 0)
+            for name, file in (("stdout", out), ("stderr", err))
+        ]
+
+        overflowed = []
+
+        def tick():
+            if stream:
+                for follower in followers:
+                    follower.poll()
+            if spool and not overflowed and sum(os.fstat(file.fileno()).st_size for file in (out, err)) > spool:
+                # The temp files would otherwise grow until the disk is full
+                overflowed.append(True)
+                kill_group(pid)
+
+        status, usage, timed_out = wait_child(pid, limits.get("timeout", 0), tick if stream or spool else None)
+        for follower in followers:
+            follower.poll(final=True)
+        returncode = os.waitstatus_to_exitcode(status)
+        stderr = tails["stderr"].text()
+        if overflowed:
+            message = f"Output exceeded {spool} bytes and the process was killed."
+        else:
+            message = exit_message(returncode, timed_out, limits.get("timeout", 0))
+        return {
+            "returncode": returncode,
+            "stdout": tails["stdout"].text(),
+            "stderr": f"{stderr.rstrip()}\n{message}".lstrip() if message else stderr,
+            "usage": {
+                "cpu_seconds": usage.ru_utime + usage.ru_stime,
+                "max_rss_bytes": usage.ru_maxrss * 1024,
+                "timed_out": timed_out,
+            },
+        }
+
+
+def main():
+    # Keep the protocol channel private: anything else printing to fd 1 goes nowhere
+    protocol = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    preload(sys.argv[1:])
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    protocol.flush()
+
+    def emit(stream: str, text: str):
+        protocol.write(json.dumps({"output": {"stream": stream, "text": text}}) + "\n")
+        protocol.flush()
+
+    def started(pid: int):
+        protocol.write(json.dumps({"started": pid}) + "\n")
+        protocol.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = run(json.loads(line), emit, started)
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import logging
+import os
+import re
+
+import docs_index
+import prettier
+import jsonsort
+import logscan
+import sqlquery
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PATH = re.compile(r"[\w.\-/]*/[\w.\-/]*")
+IMAGE = re.compile(r"\.(png|jpe?g|webp|gif|bmp|tiff?)$", re.IGNORECASE)
+
+
+def quoted(task: str) -> list:
+    """Backtick-quoted tokens in the order they appear in the task."""
+    return re.findall(r"`([^`]+)`", task)
+
+
+def write_text(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+# Handlers: plain functions over resolved local paths
+
+
+def count_weekdays(source: str, weekday: int, output: str):
+    import dateparse  # numpy and dateutil: imported on first use to keep startup light
+
+    with open(source, "r") as file:
+        count = dateparse.count_weekday(file, weekday)
+    write_text(output, str(count))
+
+
+def sort_json_array(source: str, output: str, keys: list):
+    jsonsort.sort_file(source, output, keys)
+
+
+def prettier_format(source: str, version: str = None):
+    daemon = prettier.default_daemon()
+    daemon.start()
+    if version and daemon.version != version:
+        raise prettier.FormatError(f"Task asks for Prettier {version}, daemon has {daemon.version}")
+    result = daemon.format_files([source])[0]
+    if "error" in result:
+        raise prettier.FormatError(result["error"])
+
+
+def recent_first_lines(directory: str, count: int, output: str, extension: str = ".log"):
+    write_text(output, "".join(line + "\n" for line in logscan.recent_first_lines(directory, count, extension)))
+
+
+def markdown_index(directory: str, output: str):
+    docs_index.default_indexer().update(directory, output)
+
+
+def ticket_sales(database: str, table: str, ticket_type: str, output: str):
+    total = sqlquery.scalar(
+        database,
+        f"SELECT COALESCE(SUM(units * price), 0) FROM {table} WHERE lower(trim(type)) = lower(?)",
+        (ticket_type.strip(),),
+    )
+    write_text(output, str(round(float(total), 6)))
+
+
+def similar_pair(source: str, output: str):
+    import similarity  # numpy and httpx: imported on first use to keep startup light
+
+    with open(source, "r") as file:
+        lines = [line.rstrip("\r\n") for line in file if line.strip()]
+    (_, first, second), = similarity.most_similar_pairs(lines, k=1)
+    write_text(output, f"{first}\n{second}\n")
+
+
+def card_number(source: str, output: str):
+    import cardocr  # Pillow and pytesseract: imported on first use to keep startup light
+
+    number, found_by = cardocr.extract_card_number(source)
+    if not number:
+        raise ValueError(f"No card number found in {source}")
+    logging.info(f"Card number in {source} read from {found_by}")
+    write_text(output, number)
+
+
+# Matchers: return handler parameters for a recognized task, None otherwise.
+# Each one is anchored on a whole task phrasing, so any extra condition falls through to the LLM.
+
+
+def path(name: str) -> str:
+    """Pattern for a backtick-quoted path captured as `name`."""
+    return f"`(?P<{name}>{PATH.pattern})`"
+
+
+def anchored(pattern: str) -> re.Pattern:
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def match_whole(pattern: re.Pattern, task: str):
+    """Match of the pattern against the whole task, with runs of whitespace collapsed."""
+    return pattern.fullmatch(" ".join(task.split()))
+
+
+WEEKDAY_COUNT = anchored(
+    rf"(?:the file )?{path('source')} contains a list of dates,? one per line\. "
+    rf"count the number of (?P<day>{'|'.join(WEEKDAYS)})s? in the list,? and write (?:just )?the number to {path('output')}\.?"
+)
+JSON_SORT = anchored(
+    rf"sort the array of (?:\w+ )?in {path('source')} by (?P<keys>`\w+`(?:(?:,| then|, then| and|, and) `\w+`)*),? "
+    rf"and write the result to {path('output')}\.?"
+)
+PRETTIER_FORMAT = anchored(
+    rf"format the contents of {path('source')} using `prettier(?:@(?P<version>\d[\w.\-]*))?`,? "
+    rf"updating the file in[- ]place\.?"
+)
+RECENT_LOGS = anchored(
+    rf"write the first line of the (?P<count>\d+) most recent `\.(?P<extension>\w+)` files? in {path('directory')} "
+    rf"to {path('output')},? most recent first\.?"
+)
+MARKDOWN_INDEX = anchored(
+    rf"find all markdown \(`\.md`\) files in {path('directory')}\. "
+    rf"for each file,? extract the first occurr?[ae]nce of each H1 \(i\.e\.,? a line starting with `# `\)\. "
+    rf"create an index file {path('output')} that maps each filename \(without the `(?P=directory)` prefix\) "
+    rf"to its title(?: \(e\.g\.,? `[^`]*`\))?\.?"
+)
+TICKET_SALES = anchored(
+    rf"the sqlite database file {path('database')} has an? `(?P<table>{IDENTIFIER.pattern})`(?: table)? "
+    rf"with columns `type`, `units`,? and `price`\. each row is a customer bid for a concert ticket\. "
+    rf'what is the total sales of all the items in the "(?P<ticket_type>[^"]+)" ticket type\? '
+    rf"write the number (?:in|to) {path('output')}\.?"
+)
+SIMILAR_PAIR = anchored(
+    rf"{path('source')} contains a list of comments,? one per line\. using embeddings,? "
+    rf"find the most similar pair of comments and write them to {path('output')},? one per line\.?"
+)
+CARD_NUMBER = anchored(
+    rf"{path('source')} contains a (?:credit )?card number\. pass the image to an LLM,? "
+    rf"have it extract the card number,? and write it without spaces to {path('output')}\.?"
+)
+
+
+def match_weekday_count(task: str):
+    found = match_whole(WEEKDAY_COUNT, task)
+    if not found:
+        return None
+    return {"source": found["source"], "weekday": WEEKDAYS.index(found["day"].lower()), "output": found["output"]}
+
+
+def match_json_sort(task: str):
+    found = match_whole(JSON_SORT, task)
+    if not found or not found["source"].endswith(".json"):
+        return None
+    return {"source": found["source"], "output": found["output"], "keys": quoted(found["keys"])}
+
+
+def match_prettier_format(task: str):
+    found = match_whole(PRETTIER_FORMAT, task)
+    if not found:
+        return None
+    return {"source": found["source"], "version": found["version"]}
+
+
+def match_recent_logs(task: str):
+    found = match_whole(RECENT_LOGS, task)
+    if not found:
+        return None
+    return {"directory": found["directory"], "count": int(found["count"]), "output": found["output"],
+            "extension": f".{found['extension']}"}
+
+
+def match_markdown_index(task: str):
+    found = match_whole(MARKDOWN_INDEX, task)
+    if not found or not found["directory"].endswith("/") or not found["output"].endswith(".json"):
+        return None
+    return {"directory": found["directory"], "output": found["output"]}
+
+
+def match_ticket_sales(task: str):
+    found = match_whole(TICKET_SALES, task)
+    if not found or not found["database"].endswith(".db"):
+        return None
+    return {"database": found["database"], "table": found["table"], "ticket_type": found["ticket_type"],
+            "output": found["output"]}
+
+
+def match_similar_pair(task: str):
+    found = match_whole(SIMILAR_PAIR, task)
+    if not found:
+        return None
+    return {"source": found["source"], "output": found["output"]}
+
+
+def match_card_number(task: str):
+    found = match_whole(CARD_NUMBER, task)
+    if not found or not IMAGE.search(found["source"]):
+        return None
+    return {"source": found["source"], "output": found["output"]}
+
+
+FAST_PATHS = [
+    ("weekday_count", match_weekday_count, count_weekdays, ["source", "output"]),
+    ("json_sort", match_json_sort, sort_json_array, ["source", "output"]),
+    ("prettier_format", match_prettier_format, prettier_format, ["source"]),
+    ("recent_logs", match_recent_logs, recent_first_lines, ["directory", "output"]),
+    ("markdown_index", match_markdown_index, markdown_index, ["directory", "output"]),
+    ("ticket_sales", match_ticket_sales, ticket_sales, ["database", "output"]),
+    ("similar_pair", match_similar_pair, similar_pair, ["source", "output"]),
+    ("card_number", match_card_number, card_number, ["source", "output"]),
+]
+
+
+def match(task: str):
+    """Return (name, handler, params, path_params) for a recognized task family, or None."""
+    for name, matcher, handler, path_params in FAST_PATHS:
+        params = matcher(task)
+        if params is not None:
+            return name, handler, params, path_params
+    return None
+
+
+def run(task: str, resolve) -> bool:
+    """Run a task with a built-in handler; False means the LLM should handle it."""
+    found = match(task)
+    if found is None:
+        return False
+    name, handler, params, path_params = found
+    for key in path_params:
+        params[key] = resolve(params[key])
+    try:
+        handler(**params)
+    except Exception as e:
+        logging.warning(f"Fast path '{name}' failed, falling back to the LLM: {e}")
+        return False
+    logging.info(f"Task handled by fast path '{name}' with {params}")
+    return True
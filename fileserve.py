@@ -0,0 +1,107 @@
+import mimetypes
+import mmap
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+TEXT_TYPES = {"application/json", "application/javascript", "application/xml", "application/x-sh"}
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def last_modified(stat: os.stat_result) -> str:
+    return formatdate(stat.st_mtime, usegmt=True)
+
+
+def not_modified(stat: os.stat_result, if_none_match, if_modified_since) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the file on disk."""
+    if if_none_match:
+        etag = file_etag(stat)
+        return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+    if if_modified_since:
+        try:
+            return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def media_type(path: str) -> str:
+    """Text files are served as plain text like before; binaries keep their own type."""
+    guessed, _ = mimetypes.guess_type(path)
+    if guessed is None:
+        with open(path, "rb") as file:
+            guessed = "application/octet-stream" if b"\0" in file.read(1024) else "text/plain"
+    if guessed.startswith("text/") or guessed in TEXT_TYPES:
+        return "text/plain; charset=utf-8"
+    return guessed
+
+
+def parse_range(header: str, size: int):
+    """Parse a single `bytes=` range into an inclusive (start, end); None if unsupported.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise ValueError(header)
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        raise ValueError(header)
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def tail_offset(path: str, lines: int, size: int, block: int = 64 * 1024) -> int:
+    """Byte offset where the last `lines` lines of the file start."""
+    if lines <= 0 or size == 0:
+        return size
+    with open(path, "rb") as file:
+        position = size
+        # A trailing newline terminates the last line rather than starting a new one
+        file.seek(size - 1)
+        needed = lines + (1 if file.read(1) == b"\n" else 0)
+        while position > 0:
+            step = min(block, position)
+            position -= step
+            file.seek(position)
+            data = file.read(step)
+            index = len(data)
+            while index > 0:
+                index = data.rfind(b"\n", 0, index)
+                if index < 0:
+                    break
+                needed -= 1
+                if needed == 0:
+                    return position + index + 1
+    return 0
+
+
+def iter_file(path: str, start: int, end: int, chunk_size: int, use_mmap: bool = False):
+    """Yield bytes start..end (inclusive) of a file in chunks."""
+    remaining = end - start + 1
+    if remaining <= 0:
+        return
+    with open(path, "rb") as file:
+        if use_mmap:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(start, end + 1, chunk_size):
+                    yield mapped[offset:min(offset + chunk_size, end + 1)]
+            return
+        file.seek(start)
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
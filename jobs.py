@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# Output buffer of the job being handled, for code executed on its behalf
+current_output = contextvars.ContextVar("current_output", default=None)
+
+
+class OutputBuffer:
+    """Bounded ring buffer of a job's live output; the oldest chunks are dropped first.
+
+    Chunks are numbered so readers can resume where they left off. Writers
+    may be threads; readers wait on the event loop.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.closed = False
+        self._chunks = deque()
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def write(self, stream: str, text: str):
+        if self.max_chars and len(text) > self.max_chars:
+            text = text[-self.max_chars:]
+        with self._lock:
+            self._chunks.append((self._next, stream, text))
+            self._next += 1
+            self._size += len(text)
+            while self.max_chars and self._size > self.max_chars:
+                self._size -= len(self._chunks.popleft()[2])
+        self._notify()
+
+    def close(self):
+        self.closed = True
+        self._notify()
+
+    def read(self, after: int = -1) -> tuple:
+        """(chunks numbered after `after` as (seq, stream, text), how many of those were already dropped)."""
+        with self._lock:
+            chunks = [chunk for chunk in self._chunks if chunk[0] > after]
+            first = chunks[0][0] if chunks else self._next
+        return chunks, max(0, first - after - 1)
+
+    async def wait(self, after: int, timeout: float) -> bool:
+        """Wait until there is output after `after` or the buffer is closed; False on timeout."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        self._waiters.add(waiter)
+        try:
+            if self.closed or self._next - 1 > after:
+                return True
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+    def _notify(self):
+        for loop, event in list(self._waiters):
+            loop.call_soon_threadsafe(event.set)
+
+
+class Job:
+    """A task submitted through the jobs API."""
+
+    def __init__(self, task: str, output_chars: int = 0):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.output = OutputBuffer(output_chars)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "task": self.task,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Bounded queue of jobs drained by a fixed number of async workers."""
+
+    def __init__(self, handler, workers: int, max_pending: int, max_finished: int = 1000, output_chars: int = 0):
+        self.handler = handler
+        self.output_chars = output_chars
+        self.workers = workers
+        self.max_finished = max_finished
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._tasks = []
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, task: str) -> Job:
+        """Queue a task; raises asyncio.QueueFull when the queue is at capacity."""
+        job = Job(task, self.output_chars)
+        self._queue.put_nowait(job)
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, n: int):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started = time.time()
+            current_output.set(job.output)
+            try:
+                job.result = await self.handler(job.task)
+                job.status = "done"
+            except Exception as e:
+                logging.error(f"Job {job.id} failed in worker {n}: {e}")
+                job.error = getattr(e, "detail", None) or str(e)
+                job.status = "error"
+            finally:
+                job.finished = time.time()
+                job.output.close()
+                current_output.set(None)
+                self._queue.task_done()
+
+
+class Saturated(Exception):
+    """Every task slot is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Agent is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Global cap on concurrently running tasks, with a bounded number waiting for a slot.
+
+    Callers that cannot wait are turned away with Saturated once the wait
+    queue is full; its retry_after is estimated from recent task durations.
+    """
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.running = 0
+        self.waiting = 0
+        self.average_seconds = 1.0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def saturated(self) -> bool:
+        return self.running >= self.limit and self.waiting >= self.max_waiting
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.average_seconds * (self.waiting + 1) / self.limit))
+
+    @asynccontextmanager
+    async def slot(self, wait: bool = True):
+        """Hold a task slot; with wait=False raise Saturated instead of joining a full queue."""
+        if not wait and self.saturated():
+            raise Saturated(self.retry_after())
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+            # Exponentially weighted so the estimate follows the current load
+            self.average_seconds += 0.2 * (time.perf_counter() - start - self.average_seconds)
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import json
+import os
+import tempfile
+
+from atomicfile import atomic_path
+import config
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",]"
+# Rough size of decoded Python objects relative to their JSON text, for the memory budget
+EXPANSION = 10
+MAX_FAN_IN = 64
+
+
+def iter_array(file, read_size: int = 1024 * 1024):
+    """Yield (element, length of its JSON text) for each element of a top-level JSON array, reading incrementally."""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def next_char() -> str:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return ""
+            fill()
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+    if next_char() == "]":
+        position += 1
+    else:
+        while True:
+            if not next_char():
+                raise ValueError("Unterminated JSON array")
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number cut off by the end of the buffer may continue in the next read
+                if not eof and (end == len(buffer) or buffer[end] not in DELIMITERS):
+                    fill()
+                    continue
+                break
+            yield element, end - position
+            position = end
+            separator = next_char()
+            position += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {separator!r}")
+    if next_char():
+        raise ValueError("Extra data after JSON array")
+
+
+def write_array(items, file, batch_size: int = 1024):
+    """Write items exactly as json.dump(list(items), file, indent=4) would, without building the list."""
+    encode = json.JSONEncoder(indent=4).encode
+    items = iter(items)
+    empty = True
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            break
+        # A batch encodes as "[\n    item,\n    item\n]": the items already sit at the right indent
+        file.write(("[" if empty else ",") + encode(batch)[1:-2])
+        empty = False
+    file.write("[]" if empty else "\n]")
+
+
+def _write_run(items: list, directory: str, runs: list):
+    fd, path = tempfile.mkstemp(suffix=".jsonl", dir=directory)
+    with open(fd, "w") as file:
+        for item in items:
+            file.write(json.dumps(item) + "\n")
+    runs.append(path)
+
+
+def _read_run(path: str):
+    with open(path, "r") as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def _merge(paths: list, key, directory: str, runs: list):
+    items = heapq.merge(*(_read_run(path) for path in paths), key=key)
+    _write_run(items, directory, runs)
+    for path in paths:
+        os.remove(path)
+
+
+def _sort_external(source: str, tmp_path: str, key, budget: int, temp_dir: str = None):
+    with open(source, "r") as file, tempfile.TemporaryDirectory(dir=temp_dir or config.SORT_TEMP_DIR) as directory:
+        runs, chunk, size = [], [], 0
+        for element, length in iter_array(file):
+            chunk.append(element)
+            size += length
+            if size >= budget:
+                chunk.sort(key=key)
+                _write_run(chunk, directory, runs)
+                chunk, size = [], 0
+        chunk.sort(key=key)
+        if chunk:
+            _write_run(chunk, directory, runs)
+        chunk = None
+        # Merge the oldest runs first so equal keys keep their input order
+        while len(runs) > MAX_FAN_IN:
+            merged = []
+            for start in range(0, len(runs), MAX_FAN_IN):
+                _merge(runs[start:start + MAX_FAN_IN], key, directory, merged)
+            runs = merged
+        with open(tmp_path, "w") as out:
+            write_array(heapq.merge(*(_read_run(path) for path in runs), key=key), out)
+
+
+def sort_file(source: str, output: str, keys: list, memory_bytes: int = None, temp_dir: str = None):
+    """Sort a JSON array of objects by `keys` into `output`, formatted like json.dump(indent=4).
+
+    Files that fit the memory budget are sorted in memory; larger ones are
+    parsed incrementally, sorted in chunks spilled to run files and k-way
+    merged. Either way the sort is stable, so the output is byte-identical to
+    sorting the whole list.
+    """
+    memory_bytes = memory_bytes or config.SORT_MEMORY_BYTES
+    budget = max(1, memory_bytes // EXPANSION)
+
+    def key(item):
+        return tuple(item[name] for name in keys)
+
+    with atomic_path(output) as tmp_path:
+        if os.path.getsize(source) <= budget:
+            with open(source, "r") as file:
+                items = json.load(file)
+            items.sort(key=key)
+            with open(tmp_path, "w") as out:
+                json.dump(items, out, indent=4)
+        else:
+            _sort_external(source, tmp_path, key, budget, temp_dir)
+
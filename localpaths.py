@@ -0,0 +1,14 @@
+import logging
+import os
+
+RUNNING_IN_CODESPACES = "CODESPACES" in os.environ
+RUNNING_IN_DOCKER = os.path.exists("/.dockerenv")
+
+
+def ensure_local_path(path: str) -> str:
+    """Ensure the path uses './data/...' locally, but '/data/...' in Docker."""
+    if not RUNNING_IN_CODESPACES and RUNNING_IN_DOCKER:
+        # Absolute Docker path: return as-is
+        return path
+    logging.info(f"Inside ensure_local_path with path: {path}")
+    return path.lstrip("/")
@@ -0,0 +1,50 @@
+import heapq
+import os
+
+
+def newest_files(directory: str, count: int, suffix: str = ".log", recursive: bool = False) -> list:
+    """Paths of the `count` most recently modified files ending in `suffix`, newest first.
+
+    Uses os.scandir and a bounded heap, so memory is O(count) however many
+    files the directory holds. A `count` of zero or less gives no paths.
+    """
+    if count <= 0:
+        return []
+    heap = []
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                    continue
+                if not entry.name.endswith(suffix) or not entry.is_file():
+                    continue
+                item = (entry.stat().st_mtime_ns, entry.path)
+                if len(heap) < count:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+    return [path for _, path in sorted(heap, reverse=True)]
+
+
+def read_first_line(path: str, buffer_size: int = 4096) -> str:
+    """First line of a file without its line ending, reading only as much as needed."""
+    chunks = []
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            chunk = file.read(buffer_size)
+            if not chunk:
+                break
+            newline = chunk.find(b"\n")
+            if newline >= 0:
+                chunks.append(chunk[:newline])
+                break
+            chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8", errors="replace").rstrip("\r")
+
+
+def recent_first_lines(directory: str, count: int, suffix: str = ".log", recursive: bool = False) -> list:
+    """First line of each of the `count` most recent files, newest first."""
+    return [read_first_line(path) for path in newest_files(directory, count, suffix, recursive)]
@@ -0,0 +1,170 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple, values: tuple, extra: dict = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> list:
+        if self.collect is not None:
+            self.set(self.collect())
+        return super().render()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram("agent_request_seconds", "HTTP request latency", ("path",)))
+IN_FLIGHT = REGISTRY.register(Gauge("agent_requests_in_flight", "HTTP requests currently being served"))
+STAGE_SECONDS = REGISTRY.register(Histogram("agent_stage_seconds", "Latency of each task stage", ("stage",)))
+TASKS = REGISTRY.register(Counter("agent_tasks_total", "Tasks processed, by how they were handled and the outcome", ("route", "status")))
+RETRIES = REGISTRY.register(Counter("agent_task_retries_total", "Execution retries in run_task_fix"))
+EXEC_TIMEOUTS = REGISTRY.register(Counter(
+    "agent_exec_timeouts_total", "Code executions killed at the wall-clock timeout", ("language",)))
+REJECTED = REGISTRY.register(Counter("agent_rejected_total", "Requests turned away with 429 because the agent was saturated"))
+SUBPROCESS_CPU = REGISTRY.register(Histogram(
+    "agent_subprocess_cpu_seconds", "User+system CPU time of each code execution", ("language",)))
+SUBPROCESS_RSS = REGISTRY.register(Histogram(
+    "agent_subprocess_max_rss_bytes", "Peak resident set size of each code execution", ("language",),
+    buckets=tuple(2 ** n * 1024 * 1024 for n in range(4, 14))))
+
+# Spans recorded during the current request, for the Server-Timing header
+_spans = contextvars.ContextVar("spans", default=None)
+
+
+def start_request() -> list:
+    spans = []
+    _spans.set(spans)
+    return spans
+
+
+def record(stage: str, elapsed: float):
+    """Add a measured stage to the stage histogram and the current request's spans."""
+    STAGE_SECONDS.observe(elapsed, stage=stage)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, elapsed))
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the stage histogram and the current request's spans."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def server_timing(spans: list) -> str:
+    """Server-Timing header value; repeated stages (e.g. retries) are summed."""
+    totals = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from atomicfile import atomic_path
+
+
+def normalize_task(task: str) -> str:
+    """Collapse whitespace so cosmetic differences in the task text share a plan."""
+    return re.sub(r"\s+", " ", task).strip()
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Hash of the system prompt; a changed prompt must never reuse old plans."""
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+class PlanCache:
+    """Content-addressed cache of LLM plans with an LRU memory layer and a disk layer."""
+
+    def __init__(self, directory: str, prompt: str, ttl: float, max_entries: int = 256):
+        self.directory = directory
+        self.fingerprint = prompt_fingerprint(prompt)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, task: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\n{normalize_task(task)}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _remember(self, key: str, entry: dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str):
+        try:
+            with open(self._path(key), "r") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def get(self, task: str):
+        """Return the cached plan for a task, or None on a miss."""
+        key = self.key(task)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                entry = self._load(key)
+            if entry is None or self._expired(entry["created"]):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry["plan"]
+
+    def put(self, task: str, plan: str):
+        """Store a plan in memory and on disk."""
+        key = self.key(task)
+        entry = {"task": normalize_task(task), "plan": plan, "created": time.time()}
+        with self._lock:
+            self._remember(key, entry)
+            try:
+                with atomic_path(self._path(key)) as tmp_path:
+                    with open(tmp_path, "w") as file:
+                        json.dump(entry, file)
+            except OSError as e:
+                logging.warning(f"Could not persist plan cache entry: {e}")
+
+    def preload(self) -> int:
+        """Load the most recently written plans from disk into memory; returns how many."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        except OSError:
+            return 0
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        loaded = 0
+        for entry in entries[-self.max_entries:]:
+            key = entry.name[:-len(".json")]
+            plan = self._load(key)
+            if plan is None or self._expired(plan["created"]):
+                continue
+            with self._lock:
+                if key not in self._memory:
+                    self._remember(key, plan)
+                    loaded += 1
+        return loaded
+
+    def evict(self, task: str):
+        """Forget the plan for a task, e.g. after it failed to execute."""
+        with self._lock:
+            if self._drop(self.key(task)):
+                self.evictions += 1
+
+    def _drop(self, key: str) -> bool:
+        found = self._memory.pop(key, None) is not None
+        try:
+            os.remove(self._path(key))
+            found = True
+        except FileNotFoundError:
+            pass
+        return found
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
@@ -0,0 +1,118 @@
+import json
+
+
+class PlanParser:
+    """Incremental parser for the top-level fields of a streamed JSON object.
+
+    Text is fed as it arrives; each top-level field is returned as soon as its
+    value is complete (a string the moment its closing quote arrives), long
+    before the object itself closes. Anything before the first `{`, such as a
+    Markdown code fence, is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.start = None
+        self.end = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.expect = "key"
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def document(self):
+        """Text of the JSON object once it has closed, else None."""
+        return self.buffer[self.start:self.end] if self.complete else None
+
+    def _emit(self, end: int, fields: list):
+        try:
+            fields.append((self.key, json.loads(self.buffer[self.value_start:end])))
+        except json.JSONDecodeError:
+            pass
+        self.key = None
+        self.value_start = None
+        self.expect = "comma"
+
+    def feed(self, text: str) -> list:
+        """Consume more text; returns the (key, value) pairs completed by it."""
+        self.buffer += text
+        fields = []
+        while self.position < len(self.buffer) and not self.complete:
+            index = self.position
+            char = self.buffer[index]
+            self.position += 1
+            if self.start is None:
+                if char == "{":
+                    self.start = index
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect == "key_end":
+                        self.key = json.loads(self.buffer[self.key_start:index + 1])
+                        self.expect = "colon"
+                    elif self.depth == 1 and self.expect == "value":
+                        self._emit(index + 1, fields)
+                continue
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect == "key":
+                    self.key_start = index
+                    self.expect = "key_end"
+                elif self.depth == 1 and self.expect == "value_start":
+                    self.value_start = index
+                    self.expect = "value"
+            elif char in "{[":
+                if self.depth == 1 and self.expect == "value_start":
+                    self.value_start = index
+                    self.expect = "value"
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1 and self.expect == "value" and self.value_start is not None:
+                    self._emit(index + 1, fields)
+                elif self.depth == 0:
+                    if self.expect == "value" and self.value_start is not None:
+                        self._emit(index, fields)
+                    self.end = index + 1
+            elif self.depth == 1:
+                if char == ":" and self.expect == "colon":
+                    self.expect = "value_start"
+                elif char == ",":
+                    if self.expect == "value" and self.value_start is not None:
+                        self._emit(index, fields)
+                    self.expect = "key"
+                elif not char.isspace() and self.expect == "value_start":
+                    # Numbers, true/false/null: complete at the next `,` or `}`
+                    self.value_start = index
+                    self.expect = "value"
+        return fields
+
+
+async def stream_chat(client, url: str, headers: dict, body: dict):
+    """Yield content deltas from a streamed (server-sent events) chat completion."""
+    async with client.stream("POST", url, headers=headers, json={**body, "stream": True}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            if choices:
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+
+import config
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prettier_worker.js")
+
+
+class FormatError(Exception):
+    """Prettier is unavailable or could not format a file."""
+
+
+class DaemonCrashed(FormatError):
+    pass
+
+
+class PrettierDaemon:
+    """A long-lived Node process with Prettier loaded, fed batches of files over a pipe.
+
+    Formatting matches `prettier --stdin-filepath` / `prettier --write` byte for
+    byte, without paying Node startup and npx package resolution on every call.
+    The process starts on first use and is restarted whenever it crashes or
+    stops answering.
+    """
+
+    def __init__(self, node: str = "node", timeout: float = 30, start_timeout: float = 30):
+        self.node = node
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.version = None
+        self.restarts = 0
+        self.proc = None
+        self._pending = b""
+        self._lock = threading.Lock()
+
+    def _receive(self, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._pending:
+            if not select.select([fd], [], [], max(deadline - time.monotonic(), 0))[0]:
+                raise DaemonCrashed(f"Prettier daemon did not answer within {timeout:g}s")
+            data = os.read(fd, 64 * 1024)
+            if not data:
+                try:
+                    code = self.proc.wait(1)
+                except subprocess.TimeoutExpired:
+                    code = None
+                raise DaemonCrashed(f"Prettier daemon exited with code {code}")
+            self._pending += data
+        line, self._pending = self._pending.split(b"\n", 1)
+        return json.loads(line)
+
+    def _start(self):
+        try:
+            self.proc = subprocess.Popen([self.node, WORKER_SCRIPT], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as e:
+            raise FormatError(f"Cannot start Node: {e}")
+        self._pending = b""
+        try:
+            ready = self._receive(self.start_timeout)
+        except DaemonCrashed:
+            self._stop()
+            raise
+        if ready.get("ready") is not True:
+            self._stop()
+            raise FormatError(f"Prettier is not available: {ready.get('error')}")
+        self.version = ready["version"]
+        logging.info(f"Prettier {self.version} daemon started (pid {self.proc.pid})")
+
+    def _stop(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        """Start the daemon ahead of the first request."""
+        with self._lock:
+            if not self.alive():
+                self._start()
+
+    def _request(self, request: dict) -> dict:
+        if not self.alive():
+            self._start()
+        try:
+            self.proc.stdin.write(json.dumps(request).encode() + b"\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise DaemonCrashed(f"Prettier daemon is gone: {e}")
+        reply = self._receive(self.timeout)
+        if "error" in reply:
+            raise FormatError(reply["error"])
+        return reply
+
+    def request(self, request: dict) -> dict:
+        with self._lock:
+            try:
+                return self._request(request)
+            except DaemonCrashed as e:
+                # A stuck or dead daemon is replaced and the request tried once more
+                logging.warning(f"Restarting Prettier daemon: {e}")
+                self._stop()
+                self.restarts += 1
+                try:
+                    return self._request(request)
+                except DaemonCrashed:
+                    self._stop()
+                    raise
+
+    def format_files(self, paths: list, write: bool = True) -> list:
+        """Format many files in one round trip, in place by default.
+
+        Returns one dict per path: {"path", "changed"} (plus "output" when not
+        writing) or {"path", "error"}.
+        """
+        files = [{"path": os.path.abspath(path)} for path in paths]
+        return self.request({"files": files, "write": write})["results"]
+
+    def format_text(self, text: str, filepath: str) -> str:
+        """Format text as if it were the contents of `filepath`, like `prettier --stdin-filepath`."""
+        result = self.request({"files": [{"path": os.path.abspath(filepath), "content": text}]})["results"][0]
+        if "error" in result:
+            raise FormatError(result["error"])
+        return result["output"]
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+_default_daemon = None
+
+
+def default_daemon() -> PrettierDaemon:
+    global _default_daemon
+    if _default_daemon is None:
+        _default_daemon = PrettierDaemon(config.PRETTIER_NODE, config.PRETTIER_TIMEOUT)
+    return _default_daemon
+
+
+def format_files(paths: list, write: bool = True) -> list:
+    """Format files through the shared daemon."""
+    return default_daemon().format_files(paths, write)
@@ -0,0 +1,83 @@
+// Long-lived Prettier process: one JSON request per stdin line, one JSON reply per stdout line.
+//
+// Request: {"files": [{"path": "...", "content": "..."?}], "write": true|false}
+// Reply:   {"results": [{"path", "changed", "output"?} | {"path", "error"}]}
+//
+// Each file is formatted the way `prettier --stdin-filepath <path>` / `prettier --write <path>`
+// would: same config resolution (including .editorconfig), same ignore files, same options.
+"use strict";
+
+const fs = require("fs/promises");
+const path = require("path");
+const readline = require("readline");
+
+function loadPrettier() {
+  try {
+    return require("prettier");
+  } catch (e) {
+    // Global install (npm install -g), which is not on the default require path
+    return require(path.join(path.dirname(process.execPath), "..", "lib", "node_modules", "prettier"));
+  }
+}
+
+const IGNORE_FILES = [".gitignore", ".prettierignore"];
+
+async function formatFile(prettier, file, write) {
+  const filepath = path.resolve(file.path);
+  const input = file.content ?? (await fs.readFile(filepath, "utf8"));
+  const info = await prettier.getFileInfo(filepath, {
+    ignorePath: IGNORE_FILES.map((name) => path.resolve(name)),
+  });
+  if (info.ignored) {
+    // The CLI echoes ignored stdin input unchanged and skips ignored files on --write
+    return { path: file.path, changed: false, ignored: true, ...(write ? {} : { output: input }) };
+  }
+  const options = (await prettier.resolveConfig(filepath, { editorconfig: true })) || {};
+  const output = await prettier.format(input, { ...options, filepath });
+  const changed = output !== input;
+  if (write) {
+    if (changed) await fs.writeFile(filepath, output, "utf8");
+    return { path: file.path, changed };
+  }
+  return { path: file.path, changed, output };
+}
+
+async function handle(prettier, request) {
+  // The CLI reads config files afresh on every call; so do we
+  await prettier.clearConfigCache();
+  const results = [];
+  for (const file of request.files || []) {
+    try {
+      results.push(await formatFile(prettier, file, Boolean(request.write)));
+    } catch (e) {
+      results.push({ path: file.path, error: String(e && e.message ? e.message : e) });
+    }
+  }
+  return { results };
+}
+
+async function main() {
+  let prettier;
+  try {
+    prettier = loadPrettier();
+  } catch (e) {
+    const error = String(e.message || e).split("\n")[0];
+    process.stdout.write(JSON.stringify({ ready: false, error }) + "\n");
+    process.exit(1);
+  }
+  process.stdout.write(JSON.stringify({ ready: true, version: prettier.version }) + "\n");
+
+  const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (!line.trim()) continue;
+    let reply;
+    try {
+      reply = await handle(prettier, JSON.parse(line));
+    } catch (e) {
+      reply = { error: String(e && e.message ? e.message : e) };
+    }
+    process.stdout.write(JSON.stringify(reply) + "\n");
+  }
+}
+
+main();
@@ -0,0 +1,90 @@
+import filecmp
+import os
+import shutil
+import tempfile
+
+from atomicfile import atomic_path
+from batch import infer_access
+
+
+def task_targets(task: str, resolve):
+    """Relative paths a task writes, or None if they cannot be isolated in a scratch tree.
+
+    Paths the task only reads are left out, so scratch trees link to them
+    rather than copying them and a commit never rewrites them.
+    """
+    _, writes = infer_access(task)
+    targets = []
+    for path in writes:
+        local = os.path.normpath(resolve(path))
+        if os.path.isabs(local) or local.startswith(".."):
+            return None
+        targets.append(local)
+    return targets or None
+
+
+def _split(path: str) -> tuple:
+    return tuple(part for part in path.split(os.sep) if part)
+
+
+def _build(source: str, destination: str, targets: list):
+    """Mirror `source` into `destination`: targets are copied, everything else is symlinked."""
+    os.makedirs(destination, exist_ok=True)
+    heads = {}
+    for parts in targets:
+        heads.setdefault(parts[0], []).append(parts[1:])
+    names = os.listdir(source) if os.path.isdir(source) else []
+    for name in names:
+        original = os.path.join(source, name)
+        copy = os.path.join(destination, name)
+        below = heads.get(name)
+        if below is None:
+            os.symlink(os.path.abspath(original), copy)
+        elif () in below:
+            if os.path.isdir(original):
+                # A target directory becomes real so new outputs land in the scratch tree
+                _build(original, copy, [parts for parts in below if parts])
+            else:
+                shutil.copy2(original, copy)
+        elif os.path.isdir(original):
+            _build(original, copy, below)
+        else:
+            os.symlink(os.path.abspath(original), copy)
+    for name, below in heads.items():
+        if name not in names and any(below):
+            _build(os.path.join(source, name), os.path.join(destination, name), [parts for parts in below if parts])
+
+
+def overlay(root: str, targets: list) -> str:
+    """Create a scratch directory that looks like `root` but isolates writes to `targets`."""
+    directory = tempfile.mkdtemp(prefix="candidate-")
+    _build(root, directory, [_split(target) for target in targets])
+    return directory
+
+
+def _publish(source: str, destination: str):
+    with atomic_path(destination) as tmp_path:
+        shutil.copy2(source, tmp_path)
+
+
+def _publish_changed(source: str, destination: str):
+    # Copies of files the candidate left alone would only overwrite newer writes by someone else
+    if os.path.isfile(destination) and filecmp.cmp(source, destination, shallow=False):
+        return
+    _publish(source, destination)
+
+
+def commit(directory: str, root: str, targets: list):
+    """Copy the files a candidate created or changed under its targets from the scratch tree back into `root`."""
+    for target in targets:
+        written = os.path.join(directory, target)
+        if os.path.islink(written):
+            continue
+        if os.path.isfile(written):
+            _publish_changed(written, os.path.join(root, target))
+        elif os.path.isdir(written):
+            for current, _, files in os.walk(written):
+                for name in files:
+                    path = os.path.join(current, name)
+                    if not os.path.islink(path):
+                        _publish_changed(path, os.path.join(root, os.path.relpath(path, directory)))
@@ -0,0 +1,200 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+
+import httpx
+import numpy as np
+
+from atomicfile import atomic_path
+import config
+
+
+class HashingEmbedder:
+    """Deterministic local embedding: signed feature hashing of words and character trigrams.
+
+    Needs no network, so it stands in for the real model in offline runs and tests.
+    """
+
+    def __init__(self, dim: int = 256, batch_size: int = 4096):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str):
+        words = re.findall(r"\w+", text.lower())
+        yield from words
+        joined = f" {' '.join(words)} "
+        yield from (joined[i:i + 3] for i in range(len(joined) - 2))
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def embed_batches(self, texts: list):
+        for start in range(0, len(texts), self.batch_size):
+            yield self.embed(texts[start:start + self.batch_size])
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI-compatible proxy, requested in batches."""
+
+    def __init__(self, url: str, model: str, token: str, batch_size: int = 512):
+        self.url = url
+        self.model = model
+        self.token = token
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+
+    def embed_batches(self, texts: list):
+        """Yield the vectors of each batch as soon as it arrives."""
+        with httpx.Client(timeout=config.LLM_TIMEOUT * 6) as client:
+            for start in range(0, len(texts), self.batch_size):
+                response = client.post(
+                    self.url,
+                    headers={"Authorization": f"Bearer {self.token}"},
+                    json={"model": self.model, "input": texts[start:start + self.batch_size]},
+                )
+                response.raise_for_status()
+                data = sorted(response.json()["data"], key=lambda item: item["index"])
+                yield np.array([item["embedding"] for item in data], dtype=np.float32)
+
+    def embed(self, texts: list) -> np.ndarray:
+        return np.concatenate(list(self.embed_batches(texts)))
+
+
+class EmbeddingStore:
+    """Embedding cache keyed by content hash, stored as a memory-mapped float32 matrix.
+
+    Each backend gets its own directory holding `vectors.f32` (one row per
+    distinct text, appended as new texts are seen) and `index.json` mapping
+    the sha256 of a text to its row.
+    """
+
+    def __init__(self, directory: str, embedder):
+        self.embedder = embedder
+        self.directory = os.path.join(directory, embedder.name)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self._lock = threading.Lock()
+        self._matrix = None
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.index_path, "r") as file:
+                self._index = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            self._index = {}
+        self.dim = self._index.pop("__dim__", None)
+        try:
+            size = os.path.getsize(self.vectors_path)
+        except FileNotFoundError:
+            size = None
+        if self._index and (self.dim is None or size != len(self._index) * self.dim * 4):
+            # Missing or truncated vectors: start over as an empty store
+            logging.warning(f"Embedding cache in {self.directory} is inconsistent, rebuilding it")
+            self._index, self.dim = {}, None
+        if not self._index and size is not None:
+            os.remove(self.vectors_path)
+
+    def _save_index(self):
+        with atomic_path(self.index_path) as tmp_path:
+            with open(tmp_path, "w") as file:
+                json.dump({"__dim__": self.dim, **self._index}, file)
+
+    @staticmethod
+    def content_key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def matrix(self) -> np.memmap:
+        if self._matrix is None or self._matrix.shape[0] != len(self._index):
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._index), self.dim))
+        return self._matrix
+
+    def rows(self, texts: list) -> np.ndarray:
+        """Row of each text in the matrix, embedding only texts that are not cached yet."""
+        keys = [self.content_key(text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._index and key not in missing:
+                    missing[key] = text
+            if missing:
+                logging.info(f"Embedding {len(missing)} new texts with {self.embedder.name}")
+                keys_missing = list(missing)
+                added = 0
+                try:
+                    # Each batch goes to disk as it arrives, so memory holds one batch at a time
+                    with open(self.vectors_path, "ab") as file:
+                        for vectors in self.embedder.embed_batches(list(missing.values())):
+                            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                            self.dim = self.dim or vectors.shape[1]
+                            file.write(vectors.tobytes())
+                            for key in keys_missing[added:added + len(vectors)]:
+                                self._index[key] = len(self._index)
+                            added += len(vectors)
+                finally:
+                    if added:
+                        self._save_index()
+            return np.array([self._index[key] for key in keys], dtype=np.int64)
+
+
+def top_pairs(vectors, rows: np.ndarray, k: int = 1, block_size: int = 2048) -> list:
+    """Top-k most similar (score, i, j) pairs with i < j by dot product.
+
+    `vectors` is read one tile at a time (rows[i0:i1] against rows[j0:j1]), so
+    memory stays at O(block_size**2) however many items there are.
+    """
+    n = len(rows)
+    best = []
+    for i0 in range(0, n, block_size):
+        left = np.asarray(vectors[rows[i0:i0 + block_size]], dtype=np.float32)
+        for j0 in range(i0, n, block_size):
+            right = left if j0 == i0 else np.asarray(vectors[rows[j0:j0 + block_size]], dtype=np.float32)
+            scores = left @ right.T
+            if j0 == i0:
+                scores[np.tril_indices(scores.shape[0], m=scores.shape[1])] = -np.inf
+            flat = scores.ravel()
+            take = min(k, flat.size)
+            for index in np.argpartition(flat, -take)[-take:]:
+                score = float(flat[index])
+                if score == -np.inf:
+                    continue
+                i, j = divmod(int(index), scores.shape[1])
+                item = (score, i0 + i, j0 + j)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+    return sorted(best, reverse=True)
+
+
+_default_store = None
+
+
+def default_store() -> EmbeddingStore:
+    """Store for the configured backend, created on first use."""
+    global _default_store
+    if _default_store is None:
+        token = os.getenv("AIPROXY_TOKEN")
+        if config.EMBEDDING_BACKEND == "openai" and token:
+            embedder = OpenAIEmbedder(config.EMBEDDING_API_URL, config.EMBEDDING_MODEL, token)
+        else:
+            embedder = HashingEmbedder()
+        _default_store = EmbeddingStore(os.path.join(config.CACHE_DIR, "embeddings"), embedder)
+    return _default_store
+
+
+def most_similar_pairs(texts: list, k: int = 1, store: EmbeddingStore = None) -> list:
+    """Top-k most similar pairs of texts as (score, text_a, text_b)."""
+    store = store or default_store()
+    rows = store.rows(texts)
+    return [(score, texts[i], texts[j]) for score, i, j in top_pairs(store.matrix(), rows, k, config.SIMILARITY_BLOCK_SIZE)]
@@ -0,0 +1,272 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+
+import config
+
+_duckdb = None
+
+
+def load_duckdb():
+    """The duckdb module, imported on first use since it is slow to import; None if it is not installed."""
+    global _duckdb
+    if _duckdb is None:
+        try:
+            import duckdb
+        except ImportError:
+            duckdb = False
+        _duckdb = duckdb
+    return _duckdb or None
+
+
+class QueryError(Exception):
+    """A query was rejected or failed in the database engine."""
+
+
+def file_signature(path: str) -> tuple:
+    """Changes whenever the database file is rewritten or modified."""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def is_select(sql: str) -> bool:
+    words = sql.split(None, 1)
+    return bool(words) and words[0].lower() in ("select", "with", "values")
+
+
+def sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def restrict_duckdb(connection):
+    """Cut a DuckDB connection off from the file system and extensions, for good.
+
+    Called once the database is attached, since loading the SQLite scanner and
+    opening the file both need external access.
+    """
+    connection.execute("SET enable_external_access = false")
+    connection.execute("SET lock_configuration = true")
+
+
+def check_duckdb_select(duckdb, connection, sql: str):
+    """Reject anything but a single SELECT, which DuckDB would otherwise run statement by statement."""
+    statements = connection.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryError("Only a single read-only SELECT statement is allowed")
+
+
+class ConnectionPool:
+    """Read-only, memory-mapped SQLite connections to one version of a database file."""
+
+    def __init__(self, path: str, signature: tuple, size: int, mmap_size: int, cached_statements: int):
+        self.path = path
+        self.signature = signature
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.closed = False
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        connection.execute("PRAGMA query_only = 1")
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._count < self.size:
+                    self._count += 1
+                    break
+            # Wake up periodically in case a closed connection freed a slot
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+
+    def release(self, connection: sqlite3.Connection):
+        if self.closed:
+            connection.close()
+            with self._lock:
+                self._count -= 1
+            return
+        self._idle.put(connection)
+
+    def close(self):
+        """Close idle connections; busy ones are closed when they are released."""
+        self.closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._count -= 1
+
+
+class QueryService:
+    """Read-only SQL over database files, with pooled connections per file.
+
+    Connections keep their prepared statements between queries and are dropped
+    as soon as the file's mtime, size or inode changes. With `engine="auto"`,
+    SELECTs over files of at least `duckdb_threshold` bytes go to DuckDB's
+    SQLite scanner when DuckDB and its extension are available.
+    """
+
+    def __init__(self, pool_size: int = 4, mmap_size: int = 256 * 1024 * 1024, cached_statements: int = 128,
+                 duckdb_threshold: int = None):
+        self.pool_size = pool_size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.duckdb_threshold = duckdb_threshold
+        self._pools = {}
+        self._duckdb = {}
+        self._duckdb_failed = False
+        self._lock = threading.Lock()
+
+    def _pool(self, path: str) -> ConnectionPool:
+        signature = file_signature(path)
+        with self._lock:
+            pool = self._pools.get(path)
+            if pool is not None and pool.signature == signature:
+                return pool
+            if pool is not None:
+                logging.info(f"Database changed, reopening connections: {path}")
+                pool.close()
+                stale = self._duckdb.pop(path, None)
+                if stale is not None:
+                    stale[1].close()
+            pool = ConnectionPool(path, signature, self.pool_size, self.mmap_size, self.cached_statements)
+            self._pools[path] = pool
+            return pool
+
+    def _duckdb_connection(self, path: str, signature: tuple):
+        with self._lock:
+            cached = self._duckdb.get(path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            duckdb = load_duckdb()
+            if self._duckdb_failed or duckdb is None:
+                return None
+            connection = None
+            try:
+                connection = duckdb.connect()
+                connection.execute("LOAD sqlite")
+                # ATTACH takes no parameters, so the path goes in as a literal
+                connection.execute(f"ATTACH {sql_literal(path)} AS db (TYPE sqlite, READ_ONLY)")
+                connection.execute("USE db")
+                restrict_duckdb(connection)
+            except Exception as e:
+                # The extension is downloaded on first use, which fails offline: stay on SQLite
+                logging.warning(f"DuckDB SQLite scanner unavailable, using SQLite: {e}")
+                if connection is not None:
+                    connection.close()
+                self._duckdb_failed = True
+                return None
+            if cached is not None:
+                cached[1].close()
+            self._duckdb[path] = (signature, connection)
+            return connection
+
+    def _use_duckdb(self, path: str, engine: str) -> bool:
+        if engine == "duckdb":
+            return True
+        if engine != "auto" or self.duckdb_threshold is None or self._duckdb_failed:
+            return False
+        return os.path.getsize(path) >= self.duckdb_threshold and load_duckdb() is not None
+
+    def query(self, database: str, sql: str, params=(), engine: str = "auto", max_rows: int = None) -> dict:
+        """Run a read-only SELECT; returns {"columns", "rows", "engine", "truncated"}."""
+        if engine not in ("auto", "sqlite", "duckdb"):
+            raise QueryError(f"Unknown engine: {engine}")
+        if not is_select(sql):
+            raise QueryError("Only read-only SELECT queries are allowed")
+        path = os.path.abspath(database)
+        if self._use_duckdb(path, engine):
+            connection = self._duckdb_connection(path, file_signature(path))
+            if connection is not None:
+                cursor = connection.cursor()
+                try:
+                    check_duckdb_select(load_duckdb(), cursor, sql)
+                    cursor.execute(sql, list(params))
+                    return self._result(cursor, "duckdb", max_rows)
+                except load_duckdb().Error as e:
+                    raise QueryError(str(e)) from e
+                finally:
+                    cursor.close()
+        pool = self._pool(path)
+        connection = pool.acquire()
+        try:
+            cursor = connection.execute(sql, tuple(params))
+            return self._result(cursor, "sqlite", max_rows)
+        except sqlite3.Error as e:
+            raise QueryError(str(e)) from e
+        finally:
+            pool.release(connection)
+
+    @staticmethod
+    def _result(cursor, engine: str, max_rows: int = None) -> dict:
+        columns = [column[0] for column in cursor.description or ()]
+        if max_rows is None:
+            rows, truncated = cursor.fetchall(), False
+        else:
+            rows = cursor.fetchmany(max_rows + 1)
+            truncated = len(rows) > max_rows
+            rows = rows[:max_rows]
+        return {"columns": columns, "rows": [list(row) for row in rows], "engine": engine, "truncated": truncated}
+
+    def scalar(self, database: str, sql: str, params=(), engine: str = "auto"):
+        """First column of the first row, or None."""
+        rows = self.query(database, sql, params, engine, max_rows=1)["rows"]
+        return rows[0][0] if rows else None
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            for _, connection in self._duckdb.values():
+                connection.close()
+            self._pools.clear()
+            self._duckdb.clear()
+
+
+_default_service = None
+
+
+def default_service() -> QueryService:
+    global _default_service
+    if _default_service is None:
+        _default_service = QueryService(
+            config.SQL_POOL_SIZE, config.SQL_MMAP_SIZE, config.SQL_CACHED_STATEMENTS,
+            config.SQL_DUCKDB_THRESHOLD if config.SQL_DUCKDB_ENABLED else None,
+        )
+    return _default_service
+
+
+def query(database: str, sql: str, params=(), engine: str = "auto", max_rows: int = None) -> dict:
+    """Run a read-only query through the shared service."""
+    return default_service().query(database, sql, params, engine, max_rows)
+
+
+def scalar(database: str, sql: str, params=(), engine: str = "auto"):
+    """First value of a read-only query through the shared service."""
+    return default_service().scalar(database, sql, params, engine)
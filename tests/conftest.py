@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Caches go to a throwaway directory and nothing reaches the real LLM proxy
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="agent-tests-")
+os.environ.pop("AIPROXY_TOKEN", None)
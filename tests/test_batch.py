@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import batch
+
+
+def local(path: str) -> str:
+    return path.lstrip("/")
+
+
+def plan(*tasks, **overrides):
+    items = [{"task": task} for task in tasks]
+    for index, fields in overrides.get("extra", {}).items():
+        items[index].update(fields)
+    return batch.plan_batch(items, local)
+
+
+def after(node) -> set:
+    return {earlier.index for earlier in node.after}
+
+
+COUNT = "Count the lines of `/data/a.txt` and write the number to `/data/count.txt`"
+APPEND = "Append a line to `/data/a.txt`"
+OTHER = "Count the lines of `/data/b.txt` and write the number to `/data/other.txt`"
+HELLO = "Say hello"
+
+
+@pytest.mark.parametrize("task, reads, writes", [
+    (COUNT, ["/data/a.txt"], ["/data/count.txt"]),
+    ("Read `/data/in.txt`, then `/data/in.txt` again, and save it into `/data/out/`", ["/data/in.txt"], ["/data/out/"]),
+    ("Format `/data/format.md` in place", [], ["/data/format.md"]),
+    ("Delete `/data/tmp.txt` after reading `/data/keep.txt`", ["/data/keep.txt"], ["/data/tmp.txt"]),
+    ("Use `sqlite3` on `/data/db.sqlite`", ["/data/db.sqlite"], []),
+    (HELLO, [], []),
+])
+def test_infer_access(task, reads, writes):
+    assert batch.infer_access(task) == (reads, writes)
+
+
+def test_overlaps():
+    assert batch.overlaps("data/a", "data/a")
+    assert batch.overlaps("data", os.path.join("data", "a"))
+    assert not batch.overlaps("data/a", "data/ab")
+
+
+def test_identical_tasks_share_one_run():
+    nodes, by_index = plan(COUNT, OTHER, "  " + COUNT.replace(" the ", "  the\n", 1) + " ")
+    assert len(nodes) == 2
+    assert by_index[0] is by_index[2]
+    assert by_index[0].indexes == [0, 2]
+
+
+def test_repeat_after_a_conflicting_write_runs_again():
+    nodes, by_index = plan(COUNT, APPEND, COUNT)
+    assert len(nodes) == 3
+    assert by_index[0] is not by_index[2]
+    assert after(by_index[1]) == {0}
+    assert after(by_index[2]) == {0, 1}
+
+
+def test_independent_tasks_do_not_wait():
+    nodes, _ = plan(COUNT, OTHER)
+    assert [after(node) for node in nodes] == [set(), set()]
+
+
+def test_writer_waits_for_earlier_readers_and_readers_for_earlier_writers():
+    nodes, _ = plan("Read `/data/a.txt` and write it to `/data/copy.txt`", APPEND,
+                    "Read `/data/copy.txt` and `/data/a.txt`")
+    assert [after(node) for node in nodes] == [set(), {0}, {0, 1}]
+
+
+def test_tasks_without_paths_are_barriers():
+    nodes, by_index = plan(COUNT, HELLO, OTHER)
+    assert by_index[1].barrier
+    assert [after(node) for node in nodes] == [set(), {0}, {1}]
+
+
+def test_explicit_paths_override_inference():
+    nodes, _ = plan(HELLO, OTHER, extra={0: {"reads": [], "writes": ["/data/b.txt"]}})
+    assert not nodes[0].barrier
+    assert after(nodes[1]) == {0}
+
+
+def test_explicit_after_is_never_merged():
+    nodes, by_index = plan(COUNT, OTHER, COUNT, extra={2: {"after": [1]}})
+    assert len(nodes) == 3
+    # Its own writes still order it after the first run
+    assert after(by_index[2]) == {0, 1}
+
+
+@pytest.mark.parametrize("earlier", [1, 2, -1])
+def test_after_must_name_an_earlier_task(earlier):
+    with pytest.raises(ValueError):
+        plan(COUNT, OTHER, extra={1: {"after": [earlier]}})
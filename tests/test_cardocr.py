@@ -0,0 +1,49 @@
+import pytest
+
+import cardocr
+
+VISA = "4111111111111111"
+AMEX = "378282246310005"
+
+
+@pytest.mark.parametrize("rows, expected", [
+    ([["4111", "1111", "1111", "1111"]], [VISA]),
+    ([["3782", "822463", "10005"]], [AMEX]),
+    ([[VISA]], [VISA]),
+    # A 4x4 group still counts when the row has other digits around it
+    ([["12", "4111", "1111", "1111", "1111", "345"]], [VISA]),
+    ([["4111", "1111", "1111", "1111"], ["12/25"], ["123"]], [VISA]),
+])
+def test_card_numbers_found(rows, expected):
+    assert cardocr.card_numbers(rows) == expected
+
+
+@pytest.mark.parametrize("rows", [
+    # Part of a row, in groups that do not make a 4x4 card layout
+    [["12", "4111", "1111", "1111", "111", "1"]],
+    [["9", "3782", "822463", "10005"]],
+    # Digits from different rows never join up
+    [["4111", "1111"], ["1111", "1111"]],
+    [["4111", "1111", "1111", "1112"]],
+])
+def test_card_numbers_rejected(rows):
+    assert cardocr.card_numbers(rows) == []
+
+
+def test_llm_answer_failing_luhn_is_an_error(tmp_path, monkeypatch):
+    image = tmp_path / "card.png"
+    image.write_bytes(b"not really a png")
+    monkeypatch.setattr(cardocr, "llm_card_number", lambda content, mime: "4111111111111112")
+    cache = cardocr.CardNumberCache(str(tmp_path / "cache"))
+    with pytest.raises(ValueError):
+        cardocr.extract_card_number(str(image), llm_fallback=True, cache=cache)
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_llm_answer_passing_luhn_is_cached(tmp_path, monkeypatch):
+    image = tmp_path / "card.png"
+    image.write_bytes(b"not really a png")
+    monkeypatch.setattr(cardocr, "llm_card_number", lambda content, mime: VISA)
+    cache = cardocr.CardNumberCache(str(tmp_path / "cache"))
+    assert cardocr.extract_card_number(str(image), llm_fallback=True, cache=cache) == (VISA, "llm")
+    assert cardocr.extract_card_number(str(image), llm_fallback=True, cache=cache) == (VISA, "cache")
@@ -0,0 +1,21 @@
+import pytest
+
+import deps
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("pandas", ("pandas", [], None, "")),
+    ("Pandas[Excel, performance]==2.2.3", ("pandas", ["excel", "performance"], "2.2.3", "==2.2.3")),
+    ("python_dateutil>=2.8", ("python-dateutil", [], None, ">=2.8")),
+    ("requests[socks]", ("requests", ["socks"], None, "")),
+])
+def test_parse_requirement(spec, expected):
+    assert deps.parse_requirement(spec) == expected
+
+
+def test_extras_are_never_satisfied():
+    index = deps.PackageIndex()
+    assert index.satisfied("pytest")
+    assert index.satisfied("json")
+    assert not index.satisfied("pytest[testing]")
+    assert not index.satisfied("requests[socks]")
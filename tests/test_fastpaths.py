@@ -0,0 +1,186 @@
+import json
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from dateutil.parser import parse
+
+import fastpaths
+import similarity
+
+WEEKDAY_TASK = ("The file `/data/dates.txt` contains a list of dates, one per line. Count the number of Wednesdays "
+                "in the list, and write just the number to `/data/dates-wednesdays.txt`")
+SORT_TASK = ("Sort the array of contacts in `/data/contacts.json` by `last_name`, then `first_name`, and write the "
+             "result to `/data/contacts-sorted.json`")
+LOGS_TASK = ("Write the first line of the 10 most recent `.log` file in `/data/logs/` to `/data/logs-recent.txt`, "
+             "most recent first")
+DOCS_TASK = """Find all Markdown (`.md`) files in `/data/docs/`.
+For each file, extract the first occurrance of each H1 (i.e. a line starting with `# `).
+Create an index file `/data/docs/index.json` that maps each filename (without the `/data/docs/` prefix) to its title
+(e.g. `{"README.md": "Home", "path/to/large-language-models.md": "Large Language Models", ...}`)"""
+CARD_TASK = ("`/data/credit_card.png` contains a credit card number. Pass the image to an LLM, have it extract the "
+             "card number, and write it without spaces to `/data/credit-card.txt`")
+COMMENTS_TASK = ("`/data/comments.txt` contains a list of comments, one per line. Using embeddings, find the most "
+                 "similar pair of comments and write them to `/data/comments-similar.txt`, one per line")
+TICKETS_TASK = ('The SQLite database file `/data/ticket-sales.db` has a `tickets` with columns `type`, `units`, and '
+                '`price`. Each row is a customer bid for a concert ticket. What is the total sales of all the items '
+                'in the "Gold" ticket type? Write the number in `/data/ticket-sales-gold.txt`')
+FORMAT_TASK = "Format the contents of `/data/format.md` using `prettier@3.4.2`, updating the file in-place"
+
+
+@pytest.mark.parametrize("task, name, params", [
+    (WEEKDAY_TASK, "weekday_count", {"source": "/data/dates.txt", "weekday": 2, "output": "/data/dates-wednesdays.txt"}),
+    (SORT_TASK, "json_sort", {"source": "/data/contacts.json", "output": "/data/contacts-sorted.json",
+                              "keys": ["last_name", "first_name"]}),
+    (LOGS_TASK, "recent_logs", {"directory": "/data/logs/", "count": 10, "output": "/data/logs-recent.txt",
+                                "extension": ".log"}),
+    (DOCS_TASK, "markdown_index", {"directory": "/data/docs/", "output": "/data/docs/index.json"}),
+    (CARD_TASK, "card_number", {"source": "/data/credit_card.png", "output": "/data/credit-card.txt"}),
+    (COMMENTS_TASK, "similar_pair", {"source": "/data/comments.txt", "output": "/data/comments-similar.txt"}),
+    (TICKETS_TASK, "ticket_sales", {"database": "/data/ticket-sales.db", "table": "tickets", "ticket_type": "Gold",
+                                    "output": "/data/ticket-sales-gold.txt"}),
+    (FORMAT_TASK, "prettier_format", {"source": "/data/format.md", "version": "3.4.2"}),
+    (WEEKDAY_TASK.replace("Wednesdays", "Sundays").replace("dates.txt", "dates-2.txt"), "weekday_count",
+     {"source": "/data/dates-2.txt", "weekday": 6, "output": "/data/dates-wednesdays.txt"}),
+    (TICKETS_TASK.replace('"Gold"', '"Bronze"'), "ticket_sales",
+     {"database": "/data/ticket-sales.db", "table": "tickets", "ticket_type": "Bronze",
+      "output": "/data/ticket-sales-gold.txt"}),
+])
+def test_evaluation_phrasings_match(task, name, params):
+    found = fastpaths.match(task)
+    assert found is not None
+    assert (found[0], found[2]) == (name, params)
+
+
+@pytest.mark.parametrize("task", [
+    WEEKDAY_TASK.replace("Wednesdays in the list", "Wednesdays after 2010 in the list"),
+    WEEKDAY_TASK.replace("in the list", "in the list and in `/data/dates-2.txt`"),
+    WEEKDAY_TASK.replace("Wednesdays", "Wednesdays and Fridays"),
+    WEEKDAY_TASK + ", then delete the source file",
+    SORT_TASK.replace("`first_name`", "`first_name` in descending order"),
+    SORT_TASK.replace("Sort the array of contacts", "Sort the contacts with an email address"),
+    LOGS_TASK.replace("most recent first", "oldest first"),
+    LOGS_TASK.replace("`.log` file", "`.log` file that mentions errors"),
+    DOCS_TASK.replace("first occurrance of each H1", "first occurrance of each H2"),
+    COMMENTS_TASK.replace("most similar pair", "least similar pair"),
+    COMMENTS_TASK.replace("Using embeddings, ", "Using embeddings, ignoring comments shorter than 10 characters, "),
+    TICKETS_TASK.replace("total sales", "average sales"),
+    TICKETS_TASK.replace("ticket type?", "ticket type sold after noon?"),
+    CARD_TASK.replace("without spaces", "with spaces"),
+    FORMAT_TASK.replace("updating the file in-place", "and check whether it changes"),
+    "Count the Wednesdays in `/data/dates.txt` and write them to `/data/out.txt`",
+])
+def test_near_misses_fall_through(task):
+    assert fastpaths.match(task) is None
+
+
+def test_near_miss_writes_nothing(tmp_path):
+    resolve = local(tmp_path)
+    write(resolve("/data/dates.txt"), "2024-01-03\n")
+    task = WEEKDAY_TASK.replace("Wednesdays in the list", "Wednesdays after 2010 in the list")
+    assert fastpaths.run(task, resolve) is False
+    assert not os.path.exists(resolve("/data/dates-wednesdays.txt"))
+
+
+# Output equivalence: each handler against the check evaluate.py applies
+
+
+def local(root):
+    return lambda path: os.path.join(str(root), path.lstrip("/"))
+
+
+def write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+def read(path: str) -> str:
+    with open(path, "r") as file:
+        return file.read()
+
+
+def test_weekday_count_output(tmp_path):
+    rng = random.Random(3)
+    formats = ["%Y-%m-%d", "%d-%b-%Y", "%b %d, %Y", "%Y/%m/%d %H:%M:%S"]
+    dates = [(date(2000, 1, 1) + timedelta(days=rng.randrange(9000))).strftime(rng.choice(formats)) for _ in range(500)]
+    resolve = local(tmp_path)
+    write(resolve("/data/dates.txt"), "\n".join(dates) + "\n")
+    assert fastpaths.run(WEEKDAY_TASK, resolve)
+    expected = sum(1 for value in dates if parse(value).weekday() == 2)
+    assert read(resolve("/data/dates-wednesdays.txt")).strip() == str(expected)
+
+
+def test_json_sort_output(tmp_path):
+    rng = random.Random(4)
+    names = ["Ann", "Bob", "Cid", "Dee"]
+    contacts = [{"first_name": rng.choice(names), "last_name": rng.choice(names), "email": f"{n}@example.com"}
+                for n in range(200)]
+    resolve = local(tmp_path)
+    write(resolve("/data/contacts.json"), json.dumps(contacts))
+    assert fastpaths.run(SORT_TASK, resolve)
+    contacts.sort(key=lambda c: (c["last_name"], c["first_name"]))
+    result = json.loads(read(resolve("/data/contacts-sorted.json")))
+    assert json.dumps(result, sort_keys=True) == json.dumps(contacts, sort_keys=True)
+
+
+def test_recent_logs_output(tmp_path):
+    resolve = local(tmp_path)
+    files = []
+    for n in range(30):
+        path = resolve(f"/data/logs/log-{n}.log")
+        write(path, f"first line {n}\nsecond line\n")
+        age = (n * 7919) % 30
+        os.utime(path, (1_700_000_000 - age, 1_700_000_000 - age))
+        files.append((age, f"first line {n}"))
+    assert fastpaths.run(LOGS_TASK, resolve)
+    files.sort()
+    expected = "".join(line + "\n" for _, line in files[:10])
+    assert read(resolve("/data/logs-recent.txt")).strip() == expected.strip()
+
+
+def test_markdown_index_output(tmp_path):
+    resolve = local(tmp_path)
+    expected = {}
+    for n, relative in enumerate(["README.md", "guide/intro.md", "guide/deep/more.md"]):
+        write(resolve(f"/data/docs/{relative}"), f"intro text\n## Sub\n# Title {n}\n# Second {n}\n")
+        expected[relative] = f"Title {n}"
+    assert fastpaths.run(DOCS_TASK, resolve)
+    result = json.loads(read(resolve("/data/docs/index.json")))
+    assert json.dumps(result, sort_keys=True) == json.dumps(expected, sort_keys=True)
+
+
+def test_ticket_sales_output(tmp_path):
+    rng = random.Random(5)
+    rows = [(rng.choice(["Gold", "gold", "GOLD", "Silver", "Bronze"]), rng.randint(1, 9), round(rng.uniform(1, 200), 2))
+            for _ in range(300)]
+    resolve = local(tmp_path)
+    database = resolve("/data/ticket-sales.db")
+    os.makedirs(os.path.dirname(database))
+    with sqlite3.connect(database) as connection:
+        connection.execute("CREATE TABLE tickets (type TEXT, units INTEGER, price DECIMAL)")
+        connection.executemany("INSERT INTO tickets VALUES (?, ?, ?)", rows)
+    assert fastpaths.run(TICKETS_TASK, resolve)
+    expected = sum(row[1] * row[2] for row in rows if row[0].lower() == "gold")
+    assert abs(float(read(resolve("/data/ticket-sales-gold.txt"))) - expected) < 0.1
+
+
+def test_similar_pair_output(tmp_path, monkeypatch):
+    embedder = similarity.HashingEmbedder()
+    monkeypatch.setattr(similarity, "_default_store", similarity.EmbeddingStore(str(tmp_path / "store"), embedder))
+    rng = random.Random(6)
+    words = ["apple", "banana", "cherry", "delivery", "late", "great", "service", "broken", "refund", "fast"]
+    comments = list(dict.fromkeys(" ".join(rng.choice(words) for _ in range(6)) for _ in range(60)))
+    resolve = local(tmp_path)
+    write(resolve("/data/comments.txt"), "\n".join(comments) + "\n")
+    assert fastpaths.run(COMMENTS_TASK, resolve)
+    embeddings = embedder.embed(comments)
+    scores = embeddings @ embeddings.T
+    np.fill_diagonal(scores, -np.inf)
+    i, j = np.unravel_index(scores.argmax(), scores.shape)
+    expected = "\n".join(sorted([comments[i], comments[j]]))
+    result = read(resolve("/data/comments-similar.txt"))
+    assert "\n".join(sorted(line for line in result.split("\n") if line.strip())) == expected
@@ -0,0 +1,58 @@
+import json
+import random
+import threading
+
+import pytest
+
+import jsonsort
+
+
+@pytest.mark.parametrize("memory_bytes", [10 ** 9, 2000])
+def test_matches_in_memory_sort(tmp_path, memory_bytes):
+    rng = random.Random(7)
+    items = [{"last_name": rng.choice("ABCD"), "first_name": rng.choice("EFGH"), "n": n} for n in range(500)]
+    source, output = tmp_path / "contacts.json", tmp_path / "sorted.json"
+    source.write_text(json.dumps(items))
+    jsonsort.sort_file(str(source), str(output), ["last_name", "first_name"], memory_bytes, str(tmp_path))
+    items.sort(key=lambda item: (item["last_name"], item["first_name"]))
+    assert output.read_text() == json.dumps(items, indent=4)
+
+
+@pytest.mark.parametrize("memory_bytes", [10 ** 9, 2000])
+def test_failure_leaves_no_partial_output(tmp_path, monkeypatch, memory_bytes):
+    def fail_midway(items, file, *args, **kwargs):
+        file.write("[")
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(jsonsort, "write_array", fail_midway)
+    monkeypatch.setattr(jsonsort.json, "dump", fail_midway)
+    source, output = tmp_path / "items.json", tmp_path / "sorted.json"
+    source.write_text(json.dumps([{"key": n} for n in range(300, 0, -1)]))
+    output.write_text("previous")
+    with pytest.raises(OSError):
+        jsonsort.sort_file(str(source), str(output), ["key"], memory_bytes, str(tmp_path))
+    assert output.read_text() == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["items.json", "sorted.json"]
+
+
+def test_concurrent_sorts_to_one_output(tmp_path):
+    source, output = tmp_path / "items.json", tmp_path / "sorted.json"
+    items = [{"key": n % 13, "n": n} for n in range(3000)]
+    source.write_text(json.dumps(items))
+    errors = []
+
+    def sort():
+        for _ in range(5):
+            try:
+                jsonsort.sort_file(str(source), str(output), ["key"])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=sort) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert output.read_text() == json.dumps(sorted(items, key=lambda item: item["key"]), indent=4)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["items.json", "sorted.json"]
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+import logscan
+
+
+@pytest.fixture
+def logs(tmp_path):
+    for n in range(5):
+        path = tmp_path / f"log-{n}.log"
+        path.write_text(f"first {n}\nsecond\n")
+        os.utime(path, (1_700_000_000 + n, 1_700_000_000 + n))
+    (tmp_path / "notes.txt").write_text("not a log\n")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_no_files_for_non_positive_count(logs, count):
+    assert logscan.newest_files(logs, count) == []
+    assert logscan.recent_first_lines(logs, count) == []
+
+
+def test_newest_first(logs):
+    assert logscan.recent_first_lines(logs, 3) == ["first 4", "first 3", "first 2"]
+    assert len(logscan.newest_files(logs, 10)) == 5
@@ -0,0 +1,89 @@
+import json
+import random
+
+import pytest
+
+from plan_stream import PlanParser
+
+PLANS = [
+    {"python_dependencies": ["pandas", "python-dateutil"], "language": "python",
+     "code": "import json\nprint(json.dumps({\"a\": [1, 2]}))\n"},
+    {"language": "bash", "code": "echo \"quoted \\\\ backslash\" && printf '{}[],:'", "python_dependencies": []},
+    {"code": "x = '\\u00e9 } ] \" ,'", "language": "python"},
+    {"nested": {"a": {"b": [1, {"c": "}"}]}, "d": []}, "list": [[1, 2], [], [{"e": None}]],
+     "number": -12.5e3, "integer": 42, "true": True, "false": False, "null": None, "empty": "", "last": 0},
+    {},
+]
+
+
+def chunks(text: str, rng: random.Random) -> list:
+    pieces, start = [], 0
+    while start < len(text):
+        size = rng.choice([1, 1, 2, 3, 5, 8, 13, 64])
+        pieces.append(text[start:start + size])
+        start += size
+    return pieces
+
+
+def parse(text: str, rng: random.Random) -> tuple:
+    parser = PlanParser()
+    fields = []
+    for piece in chunks(text, rng):
+        fields.extend(parser.feed(piece))
+    return parser, fields
+
+
+@pytest.mark.parametrize("plan", PLANS)
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("fence", [False, True])
+def test_fields_match_the_document(plan, indent, fence):
+    text = json.dumps(plan, indent=indent)
+    if fence:
+        text = f"```json\n{text}\n```\n"
+    for seed in range(20):
+        parser, fields = parse(text, random.Random(seed))
+        assert parser.complete
+        assert json.loads(parser.document()) == plan
+        assert [key for key, _ in fields] == list(plan)
+        assert dict(fields) == json.loads(parser.document())
+
+
+def test_field_order_is_kept_whichever_comes_first():
+    rng = random.Random(1)
+    for _ in range(50):
+        plan = dict(PLANS[0])
+        keys = list(plan)
+        rng.shuffle(keys)
+        plan = {key: plan[key] for key in keys}
+        parser, fields = parse(json.dumps(plan), rng)
+        assert fields == list(plan.items())
+
+
+def test_string_field_is_emitted_when_its_quote_closes():
+    text = json.dumps({"language": "python", "code": "print(1)", "python_dependencies": []})
+    end = text.index('"code": "print(1)"') + len('"code": "print(1)"')
+    parser = PlanParser()
+    assert parser.feed(text[:end - 1]) == [("language", "python")]
+    assert parser.feed(text[end - 1:end]) == [("code", "print(1)")]
+    assert not parser.complete
+
+
+def test_scalars_wait_for_their_delimiter():
+    parser = PlanParser()
+    assert parser.feed('{"count": 12') == []
+    assert parser.feed('3, "ok": tru') == [("count", 123)]
+    assert parser.feed("e}") == [("ok", True)]
+    assert parser.complete
+
+
+def test_text_after_the_object_is_ignored():
+    parser = PlanParser()
+    parser.feed('{"a": 1}\n```\nmore text {"b": 2}')
+    assert parser.document() == '{"a": 1}'
+
+
+def test_incomplete_document():
+    parser = PlanParser()
+    assert parser.feed('```json\n{"language": "python", "code": "pri') == [("language", "python")]
+    assert not parser.complete
+    assert parser.document() is None
@@ -0,0 +1,60 @@
+import os
+
+import scratch
+
+TASK = "Read `/data/in.txt` and write its length to `/data/out.txt`"
+
+
+def local(path: str) -> str:
+    return path.lstrip("/")
+
+
+def write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+def read(path: str) -> str:
+    with open(path, "r") as file:
+        return file.read()
+
+
+def test_targets_are_only_written_paths():
+    assert scratch.task_targets(TASK, local) == ["data/out.txt"]
+    assert scratch.task_targets("Count the lines in `/data/in.txt`", local) is None
+    assert scratch.task_targets(TASK, lambda path: path) is None
+
+
+def test_inputs_are_linked_and_left_alone(tmp_path):
+    root = str(tmp_path / "root")
+    write(os.path.join(root, "data/in.txt"), "hello")
+    write(os.path.join(root, "data/out.txt"), "old")
+    inode = os.stat(os.path.join(root, "data/in.txt")).st_ino
+    targets = scratch.task_targets(TASK, local)
+    directory = scratch.overlay(root, targets)
+    try:
+        assert os.path.islink(os.path.join(directory, "data/in.txt"))
+        assert not os.path.islink(os.path.join(directory, "data/out.txt"))
+        write(os.path.join(directory, "data/out.txt"), str(len(read(os.path.join(directory, "data/in.txt")))))
+        scratch.commit(directory, root, targets)
+    finally:
+        scratch.shutil.rmtree(directory, True)
+    assert read(os.path.join(root, "data/out.txt")) == "5"
+    assert os.stat(os.path.join(root, "data/in.txt")).st_ino == inode
+
+
+def test_commit_skips_unchanged_outputs(tmp_path):
+    root = str(tmp_path / "root")
+    write(os.path.join(root, "data/out.txt"), "same")
+    inode = os.stat(os.path.join(root, "data/out.txt")).st_ino
+    targets = ["data/out.txt", "data/reports"]
+    directory = scratch.overlay(root, targets)
+    try:
+        write(os.path.join(directory, "data/out.txt"), "same")
+        write(os.path.join(directory, "data/reports/new.txt"), "created")
+        scratch.commit(directory, root, targets)
+    finally:
+        scratch.shutil.rmtree(directory, True)
+    assert os.stat(os.path.join(root, "data/out.txt")).st_ino == inode
+    assert read(os.path.join(root, "data/reports/new.txt")) == "created"
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pytest
+
+import similarity
+
+
+class FailingEmbedder(similarity.HashingEmbedder):
+    """Hashing embedder whose request for the second batch fails."""
+
+    def embed_batches(self, texts: list):
+        for number, vectors in enumerate(super().embed_batches(texts)):
+            if number == 1:
+                raise RuntimeError("embedding service unavailable")
+            yield vectors
+
+
+def test_batches_are_kept_when_a_later_batch_fails(tmp_path):
+    store = similarity.EmbeddingStore(str(tmp_path), FailingEmbedder(dim=16, batch_size=2))
+    texts = [f"comment {n}" for n in range(5)]
+    with pytest.raises(RuntimeError):
+        store.rows(texts)
+    reopened = similarity.EmbeddingStore(str(tmp_path), similarity.HashingEmbedder(dim=16, batch_size=2))
+    assert len(reopened._index) == 2
+    rows = reopened.rows(texts)
+    expected = similarity.HashingEmbedder(dim=16).embed(texts)
+    assert np.allclose(np.asarray(reopened.matrix()[rows]), expected)
+
+
+@pytest.mark.parametrize("damage", ["missing", "truncated"])
+def test_damaged_vectors_file_starts_an_empty_store(tmp_path, damage):
+    embedder = similarity.HashingEmbedder(dim=16)
+    store = similarity.EmbeddingStore(str(tmp_path), embedder)
+    store.rows(["a", "b", "c"])
+    if damage == "missing":
+        os.remove(store.vectors_path)
+    else:
+        with open(store.vectors_path, "r+b") as file:
+            file.truncate(16 * 4)
+    reopened = similarity.EmbeddingStore(str(tmp_path), embedder)
+    assert reopened._index == {}
+    rows = reopened.rows(["b", "d"])
+    assert np.allclose(np.asarray(reopened.matrix()[rows]), embedder.embed(["b", "d"]))
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+import pytest
+
+import sqlquery
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "ticket-sales.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE tickets (type TEXT, units INTEGER, price DECIMAL)")
+        connection.executemany("INSERT INTO tickets VALUES (?, ?, ?)", [("Gold", 2, 10.5), ("Silver", 1, 4.0)])
+    return path
+
+
+@pytest.fixture
+def service():
+    service = sqlquery.QueryService(pool_size=2)
+    yield service
+    service.close()
+
+
+def test_select_runs(database, service):
+    result = service.query(database, "SELECT SUM(units * price) FROM tickets WHERE type = ?", ["Gold"])
+    assert result["rows"] == [[21.0]]
+
+
+@pytest.mark.parametrize("engine", ["auto", "sqlite", "duckdb"])
+@pytest.mark.parametrize("sql", [
+    "INSERT INTO tickets VALUES ('Bronze', 1, 1.0)",
+    "DELETE FROM tickets",
+    "COPY tickets TO '{copy}'",
+    "ATTACH '{copy}' AS other",
+    "SELECT 1; DELETE FROM tickets",
+    "SELECT 1; COPY (SELECT * FROM tickets) TO '{copy}'",
+    "WITH gold AS (SELECT 1) DELETE FROM tickets",
+])
+def test_writes_are_rejected(database, service, tmp_path, engine, sql):
+    copy = str(tmp_path / "copy.csv")
+    with pytest.raises(sqlquery.QueryError):
+        service.query(database, sql.format(copy=copy), engine=engine)
+    assert not os.path.exists(copy)
+    assert service.query(database, "SELECT COUNT(*) FROM tickets", engine="sqlite")["rows"] == [[2]]
+
+
+def test_restricted_duckdb_cannot_reach_files(tmp_path):
+    # A native DuckDB file stands in for the SQLite scanner, which may not be installable offline
+    path = str(tmp_path / "tickets.duckdb")
+    with duckdb.connect(path) as connection:
+        connection.execute("CREATE TABLE tickets AS SELECT 'Gold' AS type, 2 AS units")
+    connection = duckdb.connect()
+    connection.execute(f"ATTACH {sqlquery.sql_literal(path)} AS db (READ_ONLY)")
+    connection.execute("USE db")
+    sqlquery.restrict_duckdb(connection)
+    copy = str(tmp_path / "copy.csv")
+    for sql in [f"COPY tickets TO '{copy}'", "SELECT * FROM read_csv('/etc/passwd')",
+                "SET enable_external_access = true", "LOAD httpfs"]:
+        with pytest.raises(duckdb.Error):
+            connection.execute(sql)
+    assert not os.path.exists(copy)
+    assert connection.execute("SELECT units FROM tickets").fetchall() == [(2,)]
+    connection.close()
+
+
+@pytest.mark.parametrize("sql", ["SELECT 1; SELECT 2", "COPY (SELECT 1) TO 'x.csv'", "CREATE TABLE t (a INTEGER)"])
+def test_duckdb_accepts_only_one_select(sql):
+    with duckdb.connect() as connection:
+        with pytest.raises(sqlquery.QueryError):
+            sqlquery.check_duckdb_select(duckdb, connection, sql)
+        sqlquery.check_duckdb_select(duckdb, connection, "WITH t AS (SELECT 1 AS a) SELECT a FROM t")